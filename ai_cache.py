@@ -0,0 +1,134 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Tiempo de vida de una respuesta y tamaño máximo de la caché
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """Colapsa espacios y saltos de línea para que prompts equivalentes compartan clave."""
+    return _WHITESPACE_RE.sub(" ", prompt).strip()
+
+
+def cache_key(model_name, prompt, config=None):
+    payload = "\x00".join((
+        model_name,
+        json.dumps(config or {}, sort_keys=True, ensure_ascii=False),
+        normalize_prompt(prompt),
+    ))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Caché persistente prompt -> respuesta en SQLite, con TTL y expulsión LRU."""
+
+    def __init__(self, db_file, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(Path(db_file), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def get(self, model_name, prompt, config=None):
+        """Respuesta guardada o None si no existe o ya caducó."""
+        key = cache_key(model_name, prompt, config)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, model_name, prompt, response, config=None):
+        key = cache_key(model_name, prompt, config)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO responses (key, model, response, created, last_access) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET response = excluded.response, "
+                "created = excluded.created, last_access = excluded.last_access",
+                (key, model_name, response, now, now)
+            )
+            # Expulsar las entradas caducadas y las menos usadas si se supera el tamaño
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def stream_cached(cache, model, prompt, key_prompt=None):
+    """Genera la respuesta de `model` por fragmentos a medida que llegan.
+
+    Si la respuesta ya está en la caché se entrega de una vez. Solo se guarda
+    en la caché cuando el streaming termina; si se corta antes, no se guarda.
+    `key_prompt` es el texto con el que se guarda en la caché si no es el
+    prompt completo (p. ej. sin un contexto que cambia con cada edición).
+    """
+    model_name = getattr(model, "model_name", str(model))
+    key_prompt = prompt if key_prompt is None else key_prompt
+    cached = cache.get(model_name, key_prompt)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    for chunk in model.generate_content(prompt, stream=True):
+        try:
+            text = chunk.text
+        except ValueError:
+            # Fragmentos sin texto (p. ej. el de cierre)
+            continue
+        if text:
+            parts.append(text)
+            yield text
+    if parts:
+        cache.put(model_name, key_prompt, "".join(parts))
+
+
+def generate_cached(cache, model, prompt, generation_config=None, key_prompt=None):
+    """Texto de `model.generate_content(prompt)`, reutilizando la caché si es posible."""
+    model_name = getattr(model, "model_name", str(model))
+    key_prompt = prompt if key_prompt is None else key_prompt
+    cached = cache.get(model_name, key_prompt, generation_config)
+    if cached is not None:
+        return cached
+    if generation_config is None:
+        response = model.generate_content(prompt)
+    else:
+        response = model.generate_content(prompt, generation_config=generation_config)
+    text = response.text
+    if text:
+        cache.put(model_name, key_prompt, text, generation_config)
+    return text
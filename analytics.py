@@ -0,0 +1,173 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Días recientes con los que se calcula el ritmo para proyectar fechas de fin
+PACE_WINDOW_DAYS = 14
+
+
+def progress_event(book_id, pages, pages_read, day=None):
+    """Evento de progreso: `pages` leídas (diferencia) hasta un total de `pages_read`."""
+    return {
+        "date": (day or date.today()).isoformat(),
+        "book_id": int(book_id),
+        "pages": int(pages),
+        "pages_read": int(pages_read),
+    }
+
+
+def _week_key(day):
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _month_key(day):
+    return f"{day.year}-{day.month:02d}"
+
+
+class ReadingAnalytics:
+    """Ritmo de lectura a partir del registro de eventos de progreso.
+
+    Al crearse agrega todo el historial de forma vectorizada (pandas) en
+    acumulados diarios, semanales, mensuales y por género. Cada evento nuevo
+    solo suma en esos acumulados, así que las consultas del panel no dependen
+    de la longitud del historial.
+    """
+
+    def __init__(self, events, books):
+        self._books = books
+        self.daily = {}                    # {date: páginas}
+        self.weekly = {}                   # {"2024-W05": páginas}
+        self.monthly = {}                  # {"2024-02": páginas}
+        self.genre_pages = {}              # {género: páginas}
+        self.genre_days = defaultdict(set) # {género: {fechas con lectura}}
+        self.current_streak = 0
+        self.longest_streak = 0
+        self._last_day = None
+        self._book_ids = set()             # libros con eventos (su género está en los acumulados)
+
+        frame = pd.DataFrame(list(events), columns=["date", "book_id", "pages", "pages_read"])
+        if frame.empty:
+            return
+        frame["date"] = pd.to_datetime(frame["date"], format="%Y-%m-%d").dt.date
+        self._book_ids = set(frame["book_id"].unique().tolist())
+        genres = {book_id: (books.get(book_id) or {}).get("genre") for book_id in frame["book_id"].unique()}
+        frame["genre"] = frame["book_id"].map(genres)
+
+        daily = frame.groupby("date")["pages"].sum()
+        self.daily = {day: int(pages) for day, pages in daily.items()}
+        self.weekly = {key: int(pages) for key, pages in daily.groupby([_week_key(d) for d in daily.index]).sum().items()}
+        self.monthly = {key: int(pages) for key, pages in daily.groupby([_month_key(d) for d in daily.index]).sum().items()}
+
+        by_genre = frame.dropna(subset=["genre"])
+        self.genre_pages = {genre: int(pages) for genre, pages in by_genre.groupby("genre")["pages"].sum().items()}
+        for genre, genre_dates in by_genre[by_genre["pages"] > 0].groupby("genre")["date"]:
+            self.genre_days[genre] = set(genre_dates)
+
+        self._rebuild_streaks()
+
+    # ── Actualizaciones ──
+    def record(self, event):
+        """Suma un evento nuevo a los acumulados (O(1)).
+
+        Como `_rebuild_streaks`, un día cuenta para la racha si su total neto
+        es positivo: una corrección negativa puede quitarle un día a la racha.
+        """
+        day = date.fromisoformat(event["date"])
+        pages = event["pages"]
+        previous = self.daily.get(day, 0)
+        self.daily[day] = previous + pages
+        self.weekly[_week_key(day)] = self.weekly.get(_week_key(day), 0) + pages
+        self.monthly[_month_key(day)] = self.monthly.get(_month_key(day), 0) + pages
+
+        self._book_ids.add(event["book_id"])
+        book = self._books.get(event["book_id"])
+        if book:
+            genre = book["genre"]
+            self.genre_pages[genre] = self.genre_pages.get(genre, 0) + pages
+            if pages > 0:
+                self.genre_days[genre].add(day)
+
+        if (previous > 0) == (self.daily[day] > 0):
+            # El día sigue contando (o sin contar) para la racha
+            return
+        if self.daily[day] <= 0 or (self._last_day is not None and day < self._last_day):
+            # Un día deja de contar o llega un evento con fecha atrasada: se recalculan las rachas
+            self._rebuild_streaks()
+            return
+        if self._last_day is None or day == self._last_day + timedelta(days=1):
+            self.current_streak += 1
+        else:
+            self.current_streak = 1
+        self._last_day = day
+        self.longest_streak = max(self.longest_streak, self.current_streak)
+
+    def update_books(self, books, changed_ids):
+        """Pasa a una versión nueva del catálogo en la que cambiaron `changed_ids`.
+
+        Devuelve False si cambió algún libro con eventos: su género ya está
+        sumado en los acumulados, así que hay que rehacer el análisis.
+        """
+        self._books = books
+        return self._book_ids.isdisjoint(changed_ids)
+
+    def _rebuild_streaks(self):
+        days = np.array(sorted(d.toordinal() for d, pages in self.daily.items() if pages > 0))
+        if not len(days):
+            self.current_streak = self.longest_streak = 0
+            self._last_day = None
+            return
+        # Cada salto de más de un día empieza una racha nueva
+        breaks = np.flatnonzero(np.diff(days) != 1)
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.concatenate((breaks, [len(days) - 1]))
+        lengths = ends - starts + 1
+        self.longest_streak = int(lengths.max())
+        self.current_streak = int(lengths[-1])
+        self._last_day = date.fromordinal(int(days[-1]))
+
+    # ── Consultas ──
+    def active_streak(self, today=None):
+        """Racha actual; se pierde si ayer y hoy no hubo lectura."""
+        today = today or date.today()
+        if self._last_day is None or (today - self._last_day).days > 1:
+            return 0
+        return self.current_streak
+
+    def pages_this_week(self, today=None):
+        return self.weekly.get(_week_key(today or date.today()), 0)
+
+    def pages_this_month(self, today=None):
+        return self.monthly.get(_month_key(today or date.today()), 0)
+
+    def daily_series(self, days=30, today=None):
+        """Páginas por día de los últimos `days` días (incluye días sin lectura)."""
+        today = today or date.today()
+        index = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+        return pd.Series([self.daily.get(day, 0) for day in index], index=pd.to_datetime(index), name="Páginas")
+
+    def recent_pace(self, today=None):
+        """Páginas por día en la ventana reciente (PACE_WINDOW_DAYS)."""
+        return float(self.daily_series(PACE_WINDOW_DAYS, today).clip(lower=0).mean())
+
+    def projected_finish(self, pages_left, today=None):
+        """Fecha estimada de fin al ritmo reciente, o None si no hay ritmo."""
+        pace = self.recent_pace(today)
+        if pace <= 0:
+            return None
+        return (today or date.today()) + timedelta(days=int(np.ceil(pages_left / pace)))
+
+    def genre_pace(self):
+        """Tabla de páginas, días con lectura y páginas por día para cada género."""
+        genres = list(self.genre_pages)
+        pages = np.array([self.genre_pages[g] for g in genres], dtype=np.float64)
+        days = np.array([len(self.genre_days.get(g, ())) for g in genres], dtype=np.float64)
+        pace = np.divide(pages, days, out=np.zeros_like(pages), where=days > 0)
+        return pd.DataFrame({
+            "Género": genres,
+            "Páginas": pages.astype(int),
+            "Días": days.astype(int),
+            "Páginas por día": pace.round(1),
+        }).sort_values("Páginas por día", ascending=False, ignore_index=True)
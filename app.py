@@ -1,6 +1,8 @@
 import streamlit as st
+from functools import partial
 
-from utils import load_books, load_user_data, load_api_key
+from cards import CARD_CSS
+from utils import load_catalog, load_user_data, load_api_key, get_reading_stats, keep_widget_state, render_sidebar_stats, use_profile, switch_profile
 from tabs import tab_biblioteca, tab_recomendaciones, tab_mis_libros, tab_agregar, tab_editar, tab_seguimiento, tab_chat
 
 # Configuración de la página
@@ -11,10 +13,31 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Máximo de resultados de una búsqueda que se pueden elegir en la barra lateral
+SEARCH_LIMITS = [50, 100, 200, 500, 1000]
+DEFAULT_SEARCH_LIMIT = 200
+
+# Pestañas de la aplicación, en el orden en que se muestran
+TAB_NAMES = [
+    "📖 Biblioteca",
+    "⭐ Recomendaciones",
+    "📊 Seguimiento",
+    "📈 Mis Libros Leídos",
+    "➕ Agregar Libro",
+    "✏️ Editar Libro",
+    "💬 Libros Chat"
+]
+
 
 def main():
-    # Cargar datos
-    books = load_books()
+    # Estilos de las tarjetas de libros: una sola vez por página, no por tarjeta
+    st.markdown(CARD_CSS, unsafe_allow_html=True)
+
+    # Cargar datos (catálogo indexado por id, género y autor)
+    books = load_catalog()
+
+    # Perfil de la sesión (?perfil=nombre): cada perfil tiene sus propios datos
+    profile = use_profile()
 
     # Inicializar session state para user_data
     if 'user_data' not in st.session_state:
@@ -25,23 +48,32 @@ def main():
         st.session_state.gemini_api_key = load_api_key()
 
     user_data = st.session_state.user_data
+    stats = get_reading_stats(books, user_data)
+
+    # Conservar el estado de los widgets de las pestañas que no se dibujan en este rerun
+    keep_widget_state()
 
     # Título principal
     st.title("📚 Mi Biblioteca de Libros")
 
     # ── Sidebar: Filtros, API Key y Estadísticas ──
     with st.sidebar:
+        # Perfil de usuario
+        st.text_input("👤 Perfil", value=profile, key="profile_input", on_change=switch_profile)
+
         st.header("Filtros")
 
-        # Búsqueda por título
-        search_term = st.text_input("🔍 Buscar por título", "")
+        # Búsqueda por título, autor o descripción
+        search_term = st.text_input("🔍 Buscar por título, autor o descripción", "")
+        # Se filtran todas las coincidencias; este límite solo recorta lo que se muestra
+        search_limit = st.select_slider("Máximo de resultados", options=SEARCH_LIMITS, value=DEFAULT_SEARCH_LIMIT)
 
         # Filtro por género
-        all_genres = sorted(list(set([book["genre"] for book in books])))
+        all_genres = books.genres()
         selected_genres = st.multiselect("Género", all_genres, default=all_genres)
 
         # Filtro por autor
-        all_authors = sorted(list(set([book["author"] for book in books])))
+        all_authors = books.authors()
         selected_authors = st.multiselect("Autor", all_authors)
 
         # Filtro por estado de lectura
@@ -49,56 +81,17 @@ def main():
         show_all = st.checkbox("Todos los libros", value=True)
         show_read = st.checkbox("Libros leídos", value=False)
         show_unread = st.checkbox("Libros no leídos", value=False)
+        facet_summary = st.empty()
 
         st.markdown("---")
 
         # Estadísticas
         st.header("📊 Estadísticas")
-        read_count = len(user_data.get("read_books", []))
-        total_count = len(books)
-        st.metric("Libros leídos", f"{read_count}/{total_count}")
-
-        if read_count > 0:
-            total_pages = sum([book["pages"] for book in books if book["id"] in user_data.get("read_books", [])])
-            st.metric("Páginas leídas", f"{total_pages:,}")
-
-            ratings = user_data.get("ratings", {})
-            if ratings:
-                avg_rating = sum(ratings.values()) / len(ratings)
-                st.metric("Calificación promedio", f"{avg_rating:.1f}/5")
-
-            genre_counts = {}
-            for book in books:
-                if book["id"] in user_data.get("read_books", []):
-                    genre = book["genre"]
-                    genre_counts[genre] = genre_counts.get(genre, 0) + 1
-
-            if genre_counts:
-                st.subheader("Géneros más leídos")
-                for genre, count in sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:3]:
-                    st.write(f"• {genre}: {count}")
-
-    # ── Aplicar filtros para la biblioteca ──
-    filtered_books = books
-
-    if search_term:
-        filtered_books = [b for b in filtered_books if search_term.lower() in b["title"].lower()]
-
-    if selected_genres:
-        filtered_books = [b for b in filtered_books if b["genre"] in selected_genres]
-
-    if selected_authors:
-        filtered_books = [b for b in filtered_books if b["author"] in selected_authors]
-
-    if not show_all:
-        if show_read and not show_unread:
-            filtered_books = [b for b in filtered_books if b["id"] in user_data.get("read_books", [])]
-        elif show_unread and not show_read:
-            filtered_books = [b for b in filtered_books if b["id"] not in user_data.get("read_books", [])]
-        elif show_read and show_unread:
-            pass
-        else:
-            filtered_books = []
+        stats_placeholder = st.empty()
+        render_sidebar_stats(stats_placeholder, stats, len(books))
+
+        # Las tarjetas (fragmentos) usan esta función para refrescar las estadísticas
+        st.session_state.refresh_sidebar_stats = partial(render_sidebar_stats, stats_placeholder, stats, len(books))
 
     # Resetear página si los filtros cambian
     filter_key = f"{search_term}_{selected_genres}_{selected_authors}_{show_all}_{show_read}_{show_unread}"
@@ -108,36 +101,60 @@ def main():
         st.session_state.current_page = 1
         st.session_state.last_filter_key = filter_key
 
-    # ── Pestañas principales ──
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-        "📖 Biblioteca",
-        "⭐ Recomendaciones",
-        "📊 Seguimiento",
-        "📈 Mis Libros Leídos",
-        "➕ Agregar Libro",
-        "✏️ Editar Libro",
-        "💬 Libros Chat"
-    ])
-
-    with tab1:
-        tab_biblioteca.render(books, user_data, filtered_books)
-
-    with tab2:
+    # ── Pestañas principales (solo se ejecuta la pestaña activa) ──
+    active_tab = st.radio(
+        "Sección",
+        TAB_NAMES,
+        horizontal=True,
+        key="active_tab",
+        label_visibility="collapsed"
+    )
+
+    if active_tab == "📖 Biblioteca":
+        # ── Aplicar filtros para la biblioteca ──
+        read_state = None
+        if not show_all:
+            if show_read and not show_unread:
+                read_state = "read"
+            elif show_unread and not show_read:
+                read_state = "unread"
+            elif not show_read and not show_unread:
+                read_state = "none"
+
+        facet_result = books.filter(
+            genres=selected_genres,
+            authors=selected_authors,
+            read_ids=user_data.get("read_books", []),
+            read_state=read_state,
+            # Todas las coincidencias, por relevancia: las facetas y los conteos no pierden ninguna
+            within=books.search(search_term) if search_term else None
+        )
+        facet_summary.caption(f"📖 Leídos: {facet_result.read_count} · 📕 No leídos: {facet_result.unread_count}")
+
+        filtered_ids = facet_result.ids
+        if search_term and len(filtered_ids) > search_limit:
+            st.info(f"🔍 Se muestran los {search_limit} resultados más relevantes de {len(filtered_ids)}. "
+                    "Sube el máximo de resultados o afina la búsqueda para ver el resto.")
+            filtered_ids = filtered_ids[:search_limit]
+
+        tab_biblioteca.render(books, user_data, filtered_ids)
+
+    elif active_tab == "⭐ Recomendaciones":
         tab_recomendaciones.render(books, user_data)
 
-    with tab3:
+    elif active_tab == "📊 Seguimiento":
         tab_seguimiento.render(books, user_data)
 
-    with tab4:
+    elif active_tab == "📈 Mis Libros Leídos":
         tab_mis_libros.render(books, user_data)
 
-    with tab5:
+    elif active_tab == "➕ Agregar Libro":
         tab_agregar.render(books)
 
-    with tab6:
+    elif active_tab == "✏️ Editar Libro":
         tab_editar.render(books, user_data)
 
-    with tab7:
+    elif active_tab == "💬 Libros Chat":
         tab_chat.render(books)
 
 
@@ -0,0 +1,110 @@
+import hashlib
+import io
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Longitud máxima (en caracteres) de cada fragmento que se sintetiza por separado
+CHUNK_CHARS = 400
+
+# Estados de un trabajo de audio
+PENDING = "pending"
+DONE = "done"
+ERROR = "error"
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;:])\s+")
+
+
+def split_text(text, max_chars=CHUNK_CHARS):
+    """Divide el texto en fragmentos de frases completas de hasta `max_chars`."""
+    chunks, current = [], ""
+    for sentence in _SENTENCE_RE.split(text.strip()):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def audio_key(text, lang):
+    return hashlib.sha256(f"{lang}\x00{text.strip()}".encode("utf-8")).hexdigest()
+
+
+class GttsEngine:
+    """Motor de síntesis con gTTS. Cualquier objeto con `synthesize(text, lang)`
+    que devuelva bytes MP3 sirve como motor (p. ej. uno local para pruebas)."""
+
+    def synthesize(self, text, lang):
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text=text, lang=lang, slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class AudioJobQueue:
+    """Cola de trabajos de texto a voz atendida por un pool de hilos.
+
+    Cada audio se guarda en `cache_dir/<sha256 del texto>.mp3`, así que un
+    mismo resumen solo se sintetiza una vez. Los textos largos se dividen en
+    fragmentos que se sintetizan en paralelo y se concatenan (los MP3 admiten
+    concatenar tramas). La interfaz consulta `status` en lugar de esperar.
+    """
+
+    def __init__(self, cache_dir, engine=None, workers=2, chunk_workers=4):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.engine = engine or GttsEngine()
+        self._lock = threading.Lock()
+        self._jobs = {}  # {key: Future}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-job")
+        # Pool aparte para los fragmentos: un trabajo nunca espera a su propio pool
+        self._chunk_pool = ThreadPoolExecutor(max_workers=chunk_workers, thread_name_prefix="tts-chunk")
+
+    def path(self, key):
+        return self.cache_dir / f"{key}.mp3"
+
+    def submit(self, text, lang="es"):
+        """Encola la síntesis de `text` (si no está ya en la caché) y devuelve su clave."""
+        key = audio_key(text, lang)
+        with self._lock:
+            if self.path(key).exists():
+                return key
+            job = self._jobs.get(key)
+            if job is None or (job.done() and job.exception() is not None):
+                self._jobs[key] = self._pool.submit(self._synthesize, text, lang, key)
+        return key
+
+    def status(self, key):
+        if self.path(key).exists():
+            self._jobs.pop(key, None)
+            return DONE
+        job = self._jobs.get(key)
+        if job is None:
+            return ERROR
+        if not job.done():
+            return PENDING
+        return ERROR if job.exception() is not None else DONE
+
+    def error(self, key):
+        """Mensaje del error de un trabajo fallido (o None)."""
+        job = self._jobs.get(key)
+        if job is None:
+            return None if self.path(key).exists() else "El trabajo de audio no existe"
+        if job.done() and job.exception() is not None:
+            return str(job.exception())
+        return None
+
+    def _synthesize(self, text, lang, key):
+        chunks = split_text(text)
+        parts = list(self._chunk_pool.map(lambda chunk: self.engine.synthesize(chunk, lang), chunks))
+        # Escribir en un temporal y renombrar: un MP3 a medias nunca cuenta como listo
+        file = self.path(key)
+        tmp_file = file.with_suffix(".mp3.tmp")
+        tmp_file.write_bytes(b"".join(parts))
+        tmp_file.replace(file)
+        return file
@@ -3,6 +3,11 @@ from google import genai
 from google.genai import types
 from PIL import Image
 
+# Gemini Client (one per API key, shared by all reruns)
+@st.cache_resource(show_spinner=False)
+def get_client(api_key):
+    return genai.Client(api_key=api_key)
+
 # Page Configuration
 st.set_page_config(page_title="Conchita Image Gen", page_icon="🎨")
 st.title("🎨 Conchita Image Generator")
@@ -11,9 +16,10 @@ st.title("🎨 Conchita Image Generator")
 with st.sidebar:
     api_key = st.text_input("Enter your Gemini API Key:", type="password")
     st.info("Powered by Nano Banana technology.")
+
 # Main Interface
 if api_key:
-    client = genai.Client(api_key=api_key)
+    client = get_client(api_key)
 
     # User Inputs
     description = st.text_area("What image do you want to generate?", 
@@ -0,0 +1,114 @@
+import json
+import sys
+from collections.abc import MutableMapping
+
+# Campos de un libro en el orden en que se guardan
+BOOK_FIELDS = ("id", "title", "author", "genre", "year", "description", "pages", "cover")
+# Campos con pocos valores distintos repetidos en muchos libros: se internan
+INTERNED_FIELDS = frozenset(("author", "genre"))
+
+_FIELDS = frozenset(BOOK_FIELDS)
+
+
+class Book(MutableMapping):
+    """Libro guardado en `__slots__` (sin un dict por instancia).
+
+    Se usa igual que el dict de antes (`book["title"]`, `book.get("cover")`,
+    `dict(book)`, `{**book, "pages": 10}`), así que las pestañas no cambian.
+    Autor y género se internan: todos los libros de un mismo autor comparten
+    la misma cadena. Un campo a None equivale a una clave ausente (p. ej. un
+    libro sin portada); las claves que no están en BOOK_FIELDS no se guardan.
+    """
+
+    __slots__ = BOOK_FIELDS
+
+    def __init__(self, *values):
+        values += (None,) * (len(BOOK_FIELDS) - len(values))
+        for field, value in zip(BOOK_FIELDS, values):
+            if field in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            object.__setattr__(self, field, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Crea un libro desde un dict (si ya es un Book lo devuelve tal cual)."""
+        if isinstance(data, cls):
+            return data
+        return cls(*map(data.get, BOOK_FIELDS))
+
+    # ── Protocolo de dict ──
+    def __getitem__(self, key):
+        value = getattr(self, key) if key in _FIELDS else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in _FIELDS:
+            raise KeyError(key)
+        if key in INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        object.__setattr__(self, key, value)
+
+    def __delitem__(self, key):
+        self[key]  # KeyError si no existe
+        object.__setattr__(self, key, None)
+
+    def __iter__(self):
+        return (field for field in BOOK_FIELDS if getattr(self, field) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Book({self.to_dict()!r})"
+
+    def to_dict(self):
+        """Dict con los campos presentes (más rápido que `dict(book)`)."""
+        return {field: value for field in BOOK_FIELDS if (value := getattr(self, field)) is not None}
+
+
+def _synthetic_json(count):
+    """JSON de un catálogo sintético: 5.000 autores y 40 géneros repetidos."""
+    books = (
+        {
+            "id": i,
+            "title": f"Libro número {i}",
+            "author": f"Autor {i % 5000}",
+            "genre": f"Género {i % 40}",
+            "year": 1900 + i % 125,
+            "description": f"Descripción breve del libro {i} con algo de texto de relleno.",
+            "pages": 100 + i % 900,
+            "cover": f"https://ejemplo.com/portadas/{i}.jpg",
+        }
+        for i in range(count)
+    )
+    return "[" + ",".join(json.dumps(book, ensure_ascii=False) for book in books) + "]"
+
+
+def _measure(text, object_hook=None):
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    tracemalloc.start()
+    books = json.loads(text, object_hook=object_hook)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del books
+    return size
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compara la memoria por libro de dicts y de Book.")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    text = _synthetic_json(args.count)
+    as_dicts = _measure(text)
+    as_books = _measure(text, Book.from_dict)
+    print(f"Libros: {args.count:,}")
+    print(f"dict: {as_dicts / args.count:.0f} bytes por libro ({as_dicts / 2**20:.0f} MiB)")
+    print(f"Book: {as_books / args.count:.0f} bytes por libro ({as_books / 2**20:.0f} MiB)")
@@ -0,0 +1,201 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import chain, islice
+from pathlib import Path
+
+from catalog import title_author_key
+
+# Registros que valida cada proceso por tarea
+BATCH_SIZE = 2000
+# Portada usada cuando el registro no trae una (la misma que el formulario)
+DEFAULT_COVER = "https://via.placeholder.com/300x450/667eea/ffffff?text=Sin+Portada"
+# Límites de año y páginas (los mismos que el formulario de Agregar Libro)
+MIN_YEAR = 1000
+MAX_PAGES = 10000
+
+# Nombres de columna aceptados además de los de BOOK_FIELDS
+FIELD_ALIASES = {
+    "titulo": "title", "título": "title",
+    "autor": "author",
+    "genero": "genre", "género": "genre",
+    "año": "year", "anio": "year",
+    "descripcion": "description", "descripción": "description",
+    "paginas": "pages", "páginas": "pages",
+    "portada": "cover",
+}
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+class ImportResult:
+    """Resumen de una importación masiva."""
+
+    def __init__(self, added, duplicates, errors, seconds):
+        self.added = added              # libros añadidos (con su id)
+        self.duplicates = duplicates    # registros que ya estaban (mismo título y autor)
+        self.errors = errors            # [(línea, mensaje)] de los registros inválidos
+        self.seconds = seconds
+
+    @property
+    def total(self):
+        return len(self.added) + self.duplicates + len(self.errors)
+
+    @property
+    def books_per_second(self):
+        return self.total / self.seconds if self.seconds > 0 else 0.0
+
+
+def detect_format(name):
+    """Formato ("csv" o "jsonl") según la extensión del archivo."""
+    fmt = FORMATS.get(Path(name).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Formato no soportado: {name} (usa .csv o .jsonl)")
+    return fmt
+
+
+def read_records(file, fmt):
+    """Recorre los registros `(línea, registro)` de un archivo de texto abierto.
+
+    En JSONL el registro es la línea sin parsear: se parsea en los procesos
+    de validación junto con el resto del trabajo.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for line_number, line in enumerate(file, 1):
+            if line.strip():
+                yield line_number, line
+
+
+# ── Validación (se ejecuta en los procesos del pool) ──
+def normalize(record):
+    """Valida un registro y lo devuelve como libro (dict sin id). Lanza ValueError si no es válido."""
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido ({e.msg})")
+        if not isinstance(record, dict):
+            raise ValueError("Cada línea debe ser un objeto JSON")
+    data = {FIELD_ALIASES.get(str(key).strip().lower(), str(key).strip().lower()): value
+            for key, value in record.items() if key is not None}
+
+    book = {}
+    for field in ("title", "author", "genre", "description"):
+        book[field] = " ".join(str(data.get(field) or "").split())
+        if not book[field]:
+            raise ValueError(f"Falta el campo obligatorio '{field}'")
+    book["year"] = _int(data.get("year"), "year", MIN_YEAR, date.today().year + 1)
+    book["pages"] = _int(data.get("pages"), "pages", 1, MAX_PAGES)
+    book["cover"] = str(data.get("cover") or "").strip() or DEFAULT_COVER
+    return book
+
+
+def _int(value, field, low, high):
+    try:
+        number = int(float(value))
+    except (TypeError, ValueError):
+        raise ValueError(f"'{field}' debe ser un número (se recibió {value!r})")
+    if not low <= number <= high:
+        raise ValueError(f"'{field}' debe estar entre {low} y {high} (se recibió {number})")
+    return number
+
+
+def _normalize_batch(batch):
+    results = []
+    for line, record in batch:
+        try:
+            results.append((line, normalize(record), None))
+        except ValueError as e:
+            results.append((line, None, str(e)))
+    return results
+
+
+def validate(records, workers=None, batch_size=BATCH_SIZE):
+    """Valida los registros en un pool de procesos conservando el orden.
+
+    Como mucho hay 2 lotes por proceso en vuelo, así que el archivo se lee a
+    medida que se valida. Si todo cabe en un lote se valida aquí mismo
+    (arrancar los procesos costaría más que validarlo).
+    """
+    workers = workers or os.cpu_count() or 1
+    records = iter(records)
+    batches = iter(lambda: list(islice(records, batch_size)), [])
+    first = next(batches, None)
+    if first is None:
+        return
+    second = next(batches, None)
+    if second is None or workers == 1:
+        for batch in chain([first], [second] if second else [], batches):
+            yield from _normalize_batch(batch)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in chain([first, second], batches):
+            pending.append(pool.submit(_normalize_batch, batch))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ── Importación ──
+def import_records(records, store, workers=None, batch_size=BATCH_SIZE):
+    """Valida, quita repetidos y añade los libros al catálogo en un solo lote.
+
+    `store` es el CatalogStore: la escritura y la versión nueva del catálogo
+    se hacen una sola vez al final.
+    """
+    start = time.perf_counter()
+    catalog = store.catalog
+    books, errors, seen, duplicates = [], [], set(), 0
+    for line, book, error in validate(records, workers, batch_size):
+        if error:
+            errors.append((line, error))
+            continue
+        key = title_author_key(book["title"], book["author"])
+        if key in seen or catalog.find(book["title"], book["author"]) is not None:
+            duplicates += 1
+            continue
+        seen.add(key)
+        books.append(book)
+    added = store.add_many(books)
+    # Otra sesión pudo añadir alguno mientras tanto: también cuenta como repetido
+    duplicates += len(books) - len(added)
+    return ImportResult(added, duplicates, errors, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from catalog import Catalog
+    from catalog_store import CatalogStore
+    from storage import JsonStorage, SqliteStorage
+
+    parser = argparse.ArgumentParser(description="Importa libros en lote desde un CSV o JSONL.")
+    parser.add_argument("file", help="archivo .csv o .jsonl con los libros")
+    parser.add_argument("--books", default="data/books.json")
+    parser.add_argument("--db", default="data/libros.db")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if Path(args.db).exists():
+        storage = SqliteStorage(args.db)
+    else:
+        storage = JsonStorage(args.books, Path(args.books).with_name("user_data.json"))
+    store = CatalogStore(storage, Catalog)
+
+    with open(args.file, 'r', encoding='utf-8-sig', newline='') as f:
+        result = import_records(read_records(f, detect_format(args.file)), store, args.workers)
+
+    print(f"Importados: {len(result.added)}, repetidos: {result.duplicates}, con errores: {len(result.errors)}")
+    for line, error in result.errors[:20]:
+        print(f"  línea {line}: {error}")
+    print(f"{result.total} registros en {result.seconds:.2f} s ({result.books_per_second:,.0f} libros/s)")
@@ -0,0 +1,54 @@
+from html import escape
+from string import Template
+
+# Hoja de estilos compartida por todas las tarjetas (se inyecta una vez por página)
+CARD_CSS = """
+<style>
+.book-card { min-height: 320px; display: flex; flex-direction: column; }
+.book-card-row { display: flex; gap: 1rem; align-items: flex-start; }
+.book-card-cover { flex: 0 0 100px; width: 100px; height: 150px; overflow: hidden; border-radius: 8px; box-shadow: 0 4px 8px rgba(0,0,0,0.3); background-color: #f0f0f0; }
+.book-card-cover img { width: 100%; height: 100%; object-fit: cover; }
+.book-card-info { flex: 1; padding: 5px; min-width: 0; }
+.book-card-info h3 { margin-top: 0; font-size: 1.1em; margin-bottom: 10px; border-bottom: 2px solid #667eea; padding-bottom: 5px; font-weight: 600; line-height: 1.3; max-height: 2.6em; overflow: hidden; }
+.book-card-info p { margin: 6px 0; font-size: 0.9em; line-height: 1.4; }
+.book-card-genre { background-color: #667eea; color: white; padding: 3px 8px; border-radius: 4px; font-size: 0.85em; font-weight: 500; }
+.book-card-description { height: 85px; overflow: hidden; padding: 10px; background-color: rgba(102, 126, 234, 0.08); border-left: 3px solid #667eea; border-radius: 5px; margin: 12px 0 8px 0; font-size: 0.88em; line-height: 1.5; }
+</style>
+"""
+
+# Plantillas compiladas una sola vez al importar el módulo
+_COVER_TEMPLATE = Template('<div class="book-card-cover"><img src="$cover" /></div>')
+_CARD_TEMPLATE = Template(
+    '<div class="book-card">'
+    '<div class="book-card-row">$cover'
+    '<div class="book-card-info">'
+    '<h3>📖 $title</h3>'
+    '<p><strong>✍️ Autor:</strong> $author</p>'
+    '<p><strong>🏷️ Género:</strong> <span class="book-card-genre">$genre</span></p>'
+    '<p><strong>📅 Año:</strong> $year &nbsp;&nbsp; <strong>📄 Páginas:</strong> $pages</p>'
+    '</div></div>'
+    '<div class="book-card-description">$description</div>'
+    '</div>'
+)
+
+
+def _truncate(text, length):
+    return text if len(text) <= length else text[:length - 3] + "..."
+
+
+def card_html(book, cover=None):
+    """HTML de la parte estática de una tarjeta (portada, datos y descripción).
+
+    `cover` es la fuente de la imagen; por defecto, la URL de `book["cover"]`.
+    """
+    if cover is None:
+        cover = book.get("cover", "")
+    return _CARD_TEMPLATE.substitute(
+        cover=_COVER_TEMPLATE.substitute(cover=escape(cover)) if cover else "",
+        title=escape(_truncate(book["title"], 50)),
+        author=escape(book["author"]),
+        genre=escape(book["genre"]),
+        year=book["year"],
+        pages=book["pages"],
+        description=escape(_truncate(book["description"], 150)),
+    )
@@ -0,0 +1,227 @@
+from book import Book
+from cow import cow
+from facets import FacetIndex
+from search import SearchIndex, fold
+
+
+def title_author_key(title, author):
+    """Clave para detectar libros repetidos: título y autor sin acentos, mayúsculas ni espacios extra."""
+    return fold(" ".join(title.split())), fold(" ".join(author.split()))
+
+
+class Catalog:
+    """Catálogo de libros en memoria con índices por id, género y autor.
+
+    Mantiene el orden original de los libros (el del archivo) y resuelve
+    las búsquedas por id, género, autor o título + autor en O(1) en lugar de
+    recorrer la lista.
+    También mantiene el índice de texto completo usado por `search` y las
+    máscaras de facetas usadas por `filter`.
+
+    Los libros no se modifican en su lugar (`update` crea un registro nuevo),
+    así que `copy` puede compartirlos, igual que los índices, con la versión
+    original: cada edición de la copia solo duplica lo que cambia.
+    """
+
+    def __init__(self, books=(), similarity_file=None):
+        self._books = {}      # {book_id: book}
+        self._by_genre = {}   # {genre: {book_id: None}} (dict como conjunto ordenado)
+        self._by_author = {}  # {author: {book_id: None}}
+        self._by_title_author = {}  # {title_author_key: book_id}
+        self._max_id = 0
+        self._owned = None    # claves de _by_genre/_by_author propias (None: todas)
+        self._scorer = None
+        self._similarity = None
+        self._similarity_file = similarity_file
+        self._search = SearchIndex()
+        self._facets = FacetIndex()
+        for book in books:
+            self._index(book, bulk=True)
+        # El índice de texto y las facetas se construyen de una vez en la carga inicial
+        self._search = SearchIndex(self)
+        self._facets = FacetIndex(self)
+
+    # ── Protocolo de colección ──
+    def __len__(self):
+        return len(self._books)
+
+    def __iter__(self):
+        return iter(self._books.values())
+
+    def __contains__(self, book_id):
+        return book_id in self._books
+
+    def __bool__(self):
+        return bool(self._books)
+
+    # ── Consultas ──
+    def get(self, book_id, default=None):
+        """Devuelve el libro con ese id (acepta int o str) o `default`."""
+        try:
+            return self._books.get(int(book_id), default)
+        except (TypeError, ValueError):
+            return default
+
+    def to_list(self):
+        """Lista de libros en el orden del catálogo (para serializar)."""
+        return list(self._books.values())
+
+    def genres(self):
+        """Géneros distintos, ordenados alfabéticamente."""
+        return sorted(self._by_genre)
+
+    def authors(self):
+        """Autores distintos, ordenados alfabéticamente."""
+        return sorted(self._by_author)
+
+    def books_by_genre(self, genre):
+        return [self._books[book_id] for book_id in self._by_genre.get(genre, ())]
+
+    def books_by_author(self, author):
+        return [self._books[book_id] for book_id in self._by_author.get(author, ())]
+
+    def search(self, query, limit=None):
+        """Libros que coinciden con la consulta, ordenados por relevancia (como mucho `limit`)."""
+        return [self._books[book_id] for book_id in self._search.search(query, limit)]
+
+    def filter(self, genres=None, authors=None, read_ids=(), read_state=None, within=None):
+        """Filtra por facetas. Devuelve el `FacetResult` con los ids y los conteos.
+
+        Los libros no se materializan aquí: se obtienen con `get` solo para
+        la página que se muestra. `within` es una lista opcional de libros
+        (p. ej. resultados de `search`) cuyo orden se conserva.
+        """
+        if within is not None:
+            within = [book["id"] for book in within]
+        return self._facets.filter(genres, authors, read_ids, read_state, within)
+
+    def scorer(self):
+        """Recomendador vectorizado del catálogo (se construye al primer uso)."""
+        if self._scorer is None:
+            # NumPy solo se carga cuando se piden recomendaciones
+            from recommender import RecommendationScorer
+            self._scorer = RecommendationScorer(self)
+        return self._scorer
+
+    def similarity(self):
+        """Índice de similitud por contenido (se carga de disco al primer uso)."""
+        if self._similarity is None:
+            from similarity import SimilarityIndex
+            if self._similarity_file:
+                self._similarity = SimilarityIndex.load_or_build(self, self._similarity_file)
+            else:
+                self._similarity = SimilarityIndex.build(self)
+        return self._similarity
+
+    def similar_books(self, book_id, limit=5, exclude=()):
+        """Libros parecidos a uno dado por descripción, género y autor."""
+        ids = self.similarity().similar_to_book(int(book_id), limit, exclude)
+        return [self._books[i] for i in ids if i in self._books]
+
+    def similar_to_profile(self, book_ids, limit=5, exclude=()):
+        """Libros parecidos al conjunto indicado (p. ej. los mejor calificados)."""
+        ids = self.similarity().similar_to_profile([int(b) for b in book_ids], limit, exclude)
+        return [self._books[i] for i in ids if i in self._books]
+
+    def find(self, title, author):
+        """Libro con ese título y autor (sin distinguir acentos ni mayúsculas) o None."""
+        book_id = self._by_title_author.get(title_author_key(title, author))
+        return None if book_id is None else self._books[book_id]
+
+    def next_id(self):
+        """Siguiente id libre. No reutiliza ids de libros eliminados."""
+        return self._max_id + 1
+
+    # ── Modificaciones ──
+    def copy(self):
+        """Versión nueva del catálogo que comparte libros e índices con esta.
+
+        Las tablas son `CowDict` (solo guardan sus propios cambios sobre las de
+        esta versión) y los conjuntos por género y autor, los postings y los
+        bloques del índice de similitud se copian al modificarlos, así que
+        editar la copia no cambia esta versión y no cuesta O(n).
+        """
+        catalog = Catalog.__new__(Catalog)
+        catalog._books = cow(self._books)
+        catalog._by_genre = cow(self._by_genre)
+        catalog._by_author = cow(self._by_author)
+        catalog._by_title_author = cow(self._by_title_author)
+        catalog._max_id = self._max_id
+        catalog._owned = set()
+        catalog._scorer = None
+        catalog._similarity = self._similarity.copy() if self._similarity is not None else None
+        catalog._similarity_file = self._similarity_file
+        catalog._search = self._search.copy()
+        catalog._facets = self._facets.copy()
+        return catalog
+
+    def add(self, book):
+        """Añade un libro al catálogo asignándole id si no lo trae."""
+        if book.get("id") is None:
+            book["id"] = self.next_id()
+        if book["id"] in self._books:
+            raise ValueError(f"Ya existe un libro con id {book['id']}")
+        self._index(book)
+        return book
+
+    def update(self, book_id, **changes):
+        """Actualiza los campos indicados de un libro y reindexa si hace falta.
+
+        Devuelve un registro nuevo: el anterior puede estar en otra versión.
+        """
+        old = self._books[int(book_id)]
+        self._unindex(old)
+        book = Book.from_dict({**old, **changes})
+        self._index(book)
+        return book
+
+    def remove(self, book_id):
+        """Elimina un libro del catálogo y lo devuelve (o None si no existía)."""
+        book = self._books.get(int(book_id))
+        if book is not None:
+            self._unindex(book)
+            del self._books[book["id"]]
+            if self._similarity is not None:
+                self._similarity.remove(book["id"])
+        return book
+
+    # ── Índices internos ──
+    def _index(self, book, bulk=False):
+        book_id = book["id"]
+        self._scorer = None
+        self._books[book_id] = book
+        self._own(self._by_genre, "genre", book["genre"])[book_id] = None
+        self._own(self._by_author, "author", book["author"])[book_id] = None
+        self._by_title_author.setdefault(title_author_key(book["title"], book["author"]), book_id)
+        if book_id > self._max_id:
+            self._max_id = book_id
+        if not bulk:
+            self._search.add(book)
+            self._facets.add(book)
+            if self._similarity is not None:
+                self._similarity.add(book)
+
+    def _unindex(self, book):
+        self._scorer = None
+        self._search.remove(book["id"])
+        self._facets.remove(book["id"])
+        key = title_author_key(book["title"], book["author"])
+        if self._by_title_author.get(key) == book["id"]:
+            del self._by_title_author[key]
+        for index, name, key in ((self._by_genre, "genre", book["genre"]), (self._by_author, "author", book["author"])):
+            if key in index:
+                ids = self._own(index, name, key)
+                ids.pop(book["id"], None)
+                if not ids:
+                    del index[key]
+
+    def _own(self, index, name, key):
+        # Copia al escribir: los conjuntos compartidos con otra versión no se modifican
+        ids = index.get(key)
+        if ids is None:
+            ids = index[key] = {}
+        elif self._owned is not None and (name, key) not in self._owned:
+            ids = index[key] = cow(ids)
+        if self._owned is not None:
+            self._owned.add((name, key))
+        return ids
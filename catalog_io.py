@@ -0,0 +1,194 @@
+import codecs
+import json
+import mmap
+import os
+import re
+from functools import partial
+from pathlib import Path
+
+from book import Book
+
+# Tamaño de los trozos que se leen del archivo de libros
+CHUNK_SIZE = 1 << 20
+# A partir de este tamaño el archivo se lee con mmap (arranques en frío con catálogos enormes)
+MMAP_THRESHOLD = 64 << 20
+
+_SEPARATORS = re.compile(r"[\s,]*")
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def is_jsonl(path):
+    """True si el archivo usa JSON Lines (un libro por línea)."""
+    return Path(path).suffix == ".jsonl"
+
+
+# ── Lectura ──
+def iter_books(path, use_mmap=None):
+    """Lee los libros uno a uno (JSON o JSONL según la extensión) sin cargar el archivo entero.
+
+    Con `use_mmap=None` se usa mmap solo si el archivo supera MMAP_THRESHOLD.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    if use_mmap is None:
+        use_mmap = size >= MMAP_THRESHOLD
+    if size == 0:
+        return iter(())
+    if is_jsonl(path):
+        return _iter_lines(path, use_mmap)
+    return _iter_array(_mmap_chunks(path) if use_mmap else _file_chunks(path))
+
+
+def _file_chunks(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter(partial(f.read, CHUNK_SIZE), "")
+
+
+def _mmap_chunks(path):
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        # Un carácter UTF-8 puede quedar partido entre dos trozos
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for start in range(0, len(data), CHUNK_SIZE):
+            yield decoder.decode(data[start:start + CHUNK_SIZE])
+        yield decoder.decode(b"", final=True)
+
+
+def _iter_array(chunks):
+    """Libros de un array JSON recibido por trozos de texto (parser incremental)."""
+    decoder = json.JSONDecoder(object_hook=Book.from_dict)
+    buffer, pos, started = "", 0, False
+    for chunk in chunks:
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("El archivo de libros debe contener un array JSON")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                book, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Libro partido entre dos trozos: se sigue leyendo
+                break
+            yield book
+    raise ValueError("El archivo de libros está incompleto o no es JSON válido")
+
+
+def _iter_lines(path, use_mmap):
+    with open(path, 'rb') as f:
+        if use_mmap:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield from _parse_lines(iter(data.readline, b""))
+        else:
+            yield from _parse_lines(f)
+
+
+def _parse_lines(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line, object_hook=Book.from_dict)
+        except json.JSONDecodeError:
+            # Una última línea sin salto de línea es un append que quedó a medias
+            if line.endswith(b"\n"):
+                raise
+            return
+
+
+# ── Escritura ──
+def write_books(path, books):
+    """Escribe los libros en un temporal, libro a libro, y lo renombra al terminar.
+
+    El JSON mantiene el mismo formato que `json.dump(..., indent=2)`.
+    Devuelve el número de libros escritos.
+    """
+    path = Path(path)
+    tmp_file = path.with_suffix(path.suffix + ".tmp")
+    count = 0
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        if is_jsonl(path):
+            for book in books:
+                f.write(_line(book))
+                count += 1
+        else:
+            f.write("[")
+            for book in books:
+                f.write(",\n  " if count else "\n  ")
+                f.write(_indented(book))
+                count += 1
+            f.write("\n]" if count else "]")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    return count
+
+
+def append_books(path, books):
+    """Añade libros al final de un JSONL sin reescribirlo. Devuelve cuántos se añadieron.
+
+    Si el archivo termina en una línea a medias (un append interrumpido, que
+    `iter_books` ya ignora) se trunca antes de escribir: de lo contrario la
+    primera línea nueva quedaría pegada a ella y el archivo no se podría leer.
+    """
+    if not is_jsonl(path):
+        raise ValueError("Solo se puede añadir al final de un archivo .jsonl")
+    count = 0
+    with open(path, 'a+b') as f:
+        f.truncate(_complete_size(f))
+        for book in books:
+            f.write(_line(book).encode('utf-8'))
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    return count
+
+
+def _complete_size(f):
+    # Tamaño hasta el último salto de línea (el archivo entero si ya termina en uno)
+    end = f.seek(0, os.SEEK_END)
+    position = end
+    while position > 0:
+        start = max(0, position - CHUNK_SIZE)
+        f.seek(start)
+        chunk = f.read(position - start)
+        newline = chunk.rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+def _line(book):
+    return _encode(Book.from_dict(book).to_dict()) + "\n"
+
+
+def _indented(book):
+    # Los libros son planos y sus claves son BOOK_FIELDS: se arma la sangría a mano
+    # en lugar de usar el codificador con indent (en Python puro, bastante más lento)
+    fields = Book.from_dict(book).to_dict().items()
+    return "{\n    " + ",\n    ".join([f'"{key}": {_encode(value)}' for key, value in fields]) + "\n  }"
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Convierte el catálogo entre JSON y JSONL (o lo añade a un JSONL).")
+    parser.add_argument("source", help="archivo .json o .jsonl de origen")
+    parser.add_argument("target", help="archivo .json o .jsonl de destino")
+    parser.add_argument("--append", action="store_true", help="añadir al final del .jsonl de destino")
+    parser.add_argument("--mmap", action="store_true", help="leer el origen con mmap")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    books = iter_books(args.source, use_mmap=args.mmap or None)
+    count = append_books(args.target, books) if args.append else write_books(args.target, books)
+    elapsed = time.perf_counter() - start
+    print(f"Escritos {count} libros en {args.target} ({count / max(elapsed, 1e-9):,.0f} libros/s)")
@@ -0,0 +1,150 @@
+import threading
+from collections import deque
+
+from book import Book
+from catalog import title_author_key
+
+# Versiones recientes de las que se recuerda qué libros cambiaron
+CHANGE_LOG_SIZE = 1000
+
+
+class CatalogStore:
+    """Catálogo compartido por todas las sesiones del proceso, con versiones.
+
+    Cada versión es un `Catalog` que no se modifica una vez publicado: las
+    sesiones leen la versión actual sin copiarla. Una edición deriva la
+    versión siguiente de la actual con `Catalog.copy` (comparte libros e
+    índices y solo duplica lo que cambia), aplica el cambio con las
+    actualizaciones incrementales del catálogo, lo guarda y publica la
+    versión nueva de una vez. Las sesiones la ven en su siguiente rerun; la
+    anterior sigue siendo válida para quien la esté usando. Cada versión
+    registra qué libros cambiaron (`changed_between`) para que las sesiones
+    actualicen sus datos calculados en lugar de rehacerlos.
+    """
+
+    def __init__(self, storage, build):
+        self._storage = storage
+        self._build = build        # libros -> Catalog con sus índices listos (carga completa)
+        self._lock = threading.Lock()
+        # Los libros se leen uno a uno directamente hacia los índices
+        self._current = (1, build(storage.iter_books()))
+        # [(versión, ids de libros que cambiaron en ella)]; None: se sustituyó todo el catálogo
+        self._log = deque(maxlen=CHANGE_LOG_SIZE)
+
+    # ── Lectura ──
+    def snapshot(self):
+        """Devuelve `(versión, catálogo)` de la versión publicada."""
+        return self._current
+
+    @property
+    def version(self):
+        return self._current[0]
+
+    @property
+    def catalog(self):
+        return self._current[1]
+
+    def changed_between(self, old_version, new_version):
+        """Ids de los libros añadidos, editados o eliminados entre dos versiones.
+
+        Devuelve None si no se puede saber (la versión es demasiado antigua o
+        se sustituyó el catálogo completo): entonces hay que rehacerlo todo.
+        """
+        log = list(self._log)
+        if not log or log[0][0] > old_version + 1:
+            return None
+        changed = set()
+        for version, book_ids in log:
+            if old_version < version <= new_version:
+                if book_ids is None:
+                    return None
+                changed.update(book_ids)
+        return changed
+
+    # ── Ediciones (cada una publica una versión nueva) ──
+    def add(self, book):
+        """Añade un libro nuevo y devuelve el libro guardado.
+
+        El id se asigna aquí, con el lock tomado: nunca choca con un libro
+        añadido desde otra sesión.
+        """
+        with self._lock:
+            catalog = self.catalog.copy()
+            book = catalog.add(Book.from_dict({**book, "id": catalog.next_id()}))
+            self._storage.save_book(catalog, book)
+            self._publish(catalog, {book["id"]})
+            return book
+
+    def add_many(self, books):
+        """Añade un lote de libros en una sola escritura y una sola versión nueva.
+
+        Se omiten los que ya están en el catálogo (mismo título y autor).
+        Devuelve los libros añadidos, con su id.
+        """
+        with self._lock:
+            catalog = self.catalog
+            added, seen = [], set()
+            for book in books:
+                key = title_author_key(book["title"], book["author"])
+                if key in seen or catalog.find(book["title"], book["author"]) is not None:
+                    continue
+                seen.add(key)
+                added.append(book)
+            if not added:
+                return []
+            # Un lote grande se indexa de una vez; uno pequeño se añade sobre la versión actual
+            if len(added) > len(catalog):
+                next_id = catalog.next_id()
+                added = [Book.from_dict({**book, "id": next_id + i}) for i, book in enumerate(added)]
+                books = catalog.to_list() + added
+                self._storage.add_books(books, added)
+                self._publish(self._build(books), {book["id"] for book in added})
+            else:
+                catalog = catalog.copy()
+                added = [catalog.add(Book.from_dict({**book, "id": catalog.next_id()})) for book in added]
+                self._storage.add_books(catalog, added)
+                self._publish(catalog, {book["id"] for book in added})
+            return added
+
+    def update(self, book_id, **changes):
+        """Actualiza los campos indicados de un libro y devuelve el libro nuevo.
+
+        Lanza KeyError si el libro ya no existe (p. ej. lo eliminó otra sesión).
+        """
+        with self._lock:
+            if self.catalog.get(book_id) is None:
+                raise KeyError(book_id)
+            catalog = self.catalog.copy()
+            book = catalog.update(book_id, **changes)
+            self._storage.save_book(catalog, book)
+            self._publish(catalog, {book["id"]})
+            return book
+
+    def remove(self, book_id):
+        """Elimina un libro y lo devuelve (o None si no existía)."""
+        with self._lock:
+            if self.catalog.get(book_id) is None:
+                return None
+            catalog = self.catalog.copy()
+            book = catalog.remove(book_id)
+            self._storage.delete_book(catalog, book["id"])
+            self._publish(catalog, {book["id"]})
+            return book
+
+    def replace(self, books):
+        """Sustituye el catálogo completo (p. ej. tras una importación)."""
+        with self._lock:
+            books = [Book.from_dict(b) for b in books]
+            self._storage.save_books(books)
+            self._publish(self._build(books))
+
+    def reload(self):
+        """Vuelve a leer los libros del almacenamiento (cambios hechos fuera de la app)."""
+        with self._lock:
+            self._publish(self._build(self._storage.iter_books()))
+
+    def _publish(self, catalog, changed_ids=None):
+        # El registro se escribe antes de publicar: quien vea la versión nueva ya ve sus cambios
+        version, _ = self._current
+        self._log.append((version + 1, frozenset(changed_ids) if changed_ids is not None else None))
+        self._current = (version + 1, catalog)
@@ -0,0 +1,244 @@
+import base64
+import hashlib
+import io
+import ipaddress
+import socket
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+# Tamaños de las miniaturas: tarjetas y vista de detalle
+SMALL = (100, 150)
+LARGE = (200, 300)
+SIZES = (SMALL, LARGE)
+
+FETCH_TIMEOUT = 5
+WEBP_QUALITY = 80
+PLACEHOLDER_COLOR = "#667eea"
+USER_AGENT = "Mozilla/5.0 (Libros cover cache)"
+# Esquemas que se descargan; cualquier otro (file://, ftp://, data:...) usa el marcador
+ALLOWED_SCHEMES = ("http", "https")
+# Miniaturas codificadas como data URI que se mantienen en memoria
+MAX_DATA_URIS = 512
+# Tamaño máximo (bytes) de una portada descargada
+MAX_COVER_BYTES = 5 * 1024 * 1024
+# Segundos tras los que se vuelve a intentar una portada que falló
+FAILED_RETRY_SECONDS = 600
+# URLs fallidas que se recuerdan como mucho (las caducadas se descartan al pasarse)
+MAX_FAILED = 4096
+# Descargas en segundo plano simultáneas
+FETCH_WORKERS = 4
+
+
+def _size_name(size):
+    return f"{size[0]}x{size[1]}"
+
+
+def check_url(url):
+    """Lanza ValueError si `url` no es http(s) o apunta a una dirección no pública.
+
+    Las URLs de portada las escriben los usuarios: sin esto el servidor podría
+    leer archivos locales (file://) o servicios internos (127.0.0.1, 10.x, 169.254.x...).
+    """
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ALLOWED_SCHEMES:
+        raise ValueError(f"Esquema no permitido: {url}")
+    if not parts.hostname:
+        raise ValueError(f"URL sin servidor: {url}")
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, parts.port or None, proto=socket.IPPROTO_TCP)
+    except socket.gaierror as e:
+        raise ValueError(f"No se pudo resolver {parts.hostname}: {e}")
+    for *_, sockaddr in addresses:
+        if not ipaddress.ip_address(sockaddr[0].split("%")[0]).is_global:
+            raise ValueError(f"Dirección no pública: {parts.hostname} ({sockaddr[0]})")
+
+
+class _CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    # Cada redirección se valida igual que la URL original
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_opener = urllib.request.build_opener(_CheckedRedirectHandler)
+
+
+class CoverCache:
+    """Caché en disco de las portadas, como miniaturas WebP.
+
+    Cada portada se descarga una sola vez y se guarda en los tamaños de
+    SIZES (`<sha1 de la URL>_<ancho>x<alto>.webp`). Las descargas se hacen en
+    segundo plano: mientras no está en disco (o si la descarga falla, o el
+    libro no tiene portada) se usa un marcador generado localmente, así que
+    dibujar una página nunca espera a la red. Una portada que falló se vuelve
+    a intentar pasados FAILED_RETRY_SECONDS.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._failed = {}         # {URL: momento en que falló}
+        self._queued = set()      # URLs con descarga pendiente en segundo plano
+        self._pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="cover-fetch")
+        self._data_uris = OrderedDict()  # {(ruta, tamaño): data URI}, del menos al más reciente
+
+    def _file(self, key, size):
+        return self.cache_dir / f"{key}_{_size_name(size)}.webp"
+
+    def path(self, url, size=SMALL):
+        """Ruta local de la miniatura de `url`, o del marcador si aún no está descargada.
+
+        No espera a la red: si falta, encola la descarga y la portada aparece
+        en un rerun posterior.
+        """
+        if not url:
+            return self.placeholder(size)
+        file = self._file(self._key(url), size)
+        if file.exists():
+            return file
+        self.request([url])
+        return self.placeholder(size)
+
+    def request(self, urls):
+        """Encola en segundo plano la descarga de las portadas que faltan (no bloquea)."""
+        for url in urls:
+            if not url or self._file(self._key(url), LARGE).exists():
+                continue
+            with self._lock:
+                if url in self._queued or self._recently_failed(url):
+                    continue
+                self._queued.add(url)
+            self._pool.submit(self._fetch_queued, url)
+
+    def _fetch_queued(self, url):
+        try:
+            self._fetch(url, self._key(url))
+        finally:
+            with self._lock:
+                self._queued.discard(url)
+
+    def _recently_failed(self, url):
+        failed_at = self._failed.get(url)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at < FAILED_RETRY_SECONDS:
+            return True
+        self._failed.pop(url, None)
+        return False
+
+    def data_uri(self, url, size=SMALL):
+        """Miniatura como `data:` URI, para incrustarla en el HTML de una tarjeta."""
+        file = self.path(url, size)
+        with self._lock:
+            uri = self._data_uris.get((file, size))
+            if uri is not None:
+                self._data_uris.move_to_end((file, size))
+                return uri
+        uri = "data:image/webp;base64," + base64.b64encode(file.read_bytes()).decode("ascii")
+        with self._lock:
+            self._data_uris[(file, size)] = uri
+            if len(self._data_uris) > MAX_DATA_URIS:
+                self._data_uris.popitem(last=False)
+        return uri
+
+    def placeholder(self, size=SMALL):
+        file = self._file("placeholder", size)
+        if not file.exists():
+            with self._lock:
+                if not file.exists():
+                    self._write(self._placeholder_image(size), file)
+        return file
+
+    def prefetch(self, urls, workers=8):
+        """Descarga en paralelo (y espera a) las portadas que aún no están en la caché.
+
+        Para la línea de comandos. Devuelve (descargadas, fallidas).
+        """
+        pending = {
+            url for url in urls
+            if url and not self._recently_failed(url) and not self._file(self._key(url), LARGE).exists()
+        }
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda url: self._fetch(url, self._key(url)), pending))
+        fetched = sum(results)
+        return fetched, len(results) - fetched
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _fetch(self, url, key):
+        try:
+            check_url(url)
+            request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+            with _opener.open(request, timeout=FETCH_TIMEOUT) as response:
+                data = response.read(MAX_COVER_BYTES + 1)
+            if len(data) > MAX_COVER_BYTES:
+                raise ValueError(f"Portada de más de {MAX_COVER_BYTES} bytes: {url}")
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except (OSError, ValueError, Image.DecompressionBombError):
+            # Sin red, URL rota o imagen inválida: se usa el marcador y se reintenta más tarde
+            with self._lock:
+                now = time.monotonic()
+                self._failed[url] = now
+                if len(self._failed) > MAX_FAILED:
+                    # Se olvidan los fallos que ya se pueden reintentar
+                    self._failed = {u: t for u, t in self._failed.items() if now - t < FAILED_RETRY_SECONDS}
+            return False
+
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size in SIZES:
+            # Recorte centrado, como `object-fit: cover`
+            self._write(ImageOps.fit(image, size, Image.Resampling.LANCZOS), self._file(key, size))
+        return True
+
+    @staticmethod
+    def _write(image, file):
+        # Escribir en un temporal y renombrar para no dejar miniaturas a medias
+        tmp_file = file.with_suffix(f".{threading.get_ident()}.tmp")
+        image.save(tmp_file, "WEBP", quality=WEBP_QUALITY)
+        tmp_file.replace(file)
+
+    @staticmethod
+    def _placeholder_image(size):
+        image = Image.new("RGB", size, PLACEHOLDER_COLOR)
+        draw = ImageDraw.Draw(image)
+        font = ImageFont.load_default(size=max(size[0] // 8, 10))
+        draw.multiline_text(
+            (size[0] / 2, size[1] / 2), "Sin\nportada",
+            fill="white", font=font, anchor="mm", align="center"
+        )
+        return image
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Descarga y guarda en caché las portadas de todos los libros.")
+    parser.add_argument("--books", default="data/books.json")
+    parser.add_argument("--db", default="data/libros.db")
+    parser.add_argument("--cache-dir", default="data/covers")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    if Path(args.db).exists():
+        from storage import SqliteStorage
+        books = SqliteStorage(args.db).load_books()
+    else:
+        with open(args.books, 'r', encoding='utf-8') as f:
+            books = json.load(f)
+
+    fetched, failed = CoverCache(args.cache_dir).prefetch(
+        (book.get("cover") for book in books), workers=args.workers
+    )
+    print(f"Portadas descargadas: {fetched}, fallidas: {failed}")
@@ -0,0 +1,115 @@
+from collections.abc import MutableMapping
+from math import isqrt
+
+# Cambios mínimos antes de compactar (con pocos libros no compensa antes)
+COMPACT_MIN = 64
+
+_UNCHANGED = object()
+_DELETED = object()
+
+
+class CowDict(MutableMapping):
+    """Dict de copia al escribir: una base compartida que nunca se modifica y los cambios propios.
+
+    `copy` solo copia los cambios, así que derivar una versión nueva de un
+    índice grande cuesta lo que ocupan sus cambios y no lo que ocupa el
+    índice. Cuando los cambios superan la raíz cuadrada del tamaño de la
+    base se compactan en una base nueva (copia a nivel de C), con lo que
+    el coste amortizado por edición sigue siendo pequeño.
+    Como un dict, conserva el orden de inserción.
+    """
+
+    __slots__ = ("_base", "_changes", "_len")
+
+    def __init__(self, base=None):
+        self._base = base if base is not None else {}
+        self._changes = {}  # {clave: valor o _DELETED}
+        self._len = len(self._base)
+
+    def copy(self):
+        other = CowDict.__new__(CowDict)
+        other._base, other._changes, other._len = self._base, dict(self._changes), self._len
+        return other
+
+    # ── Lectura ──
+    def __getitem__(self, key):
+        value = self._changes.get(key, _UNCHANGED)
+        if value is _UNCHANGED:
+            return self._base[key]
+        if value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._changes.get(key, _UNCHANGED)
+        if value is _UNCHANGED:
+            return self._base.get(key, default)
+        return default if value is _DELETED else value
+
+    def __contains__(self, key):
+        value = self._changes.get(key, _UNCHANGED)
+        if value is _UNCHANGED:
+            return key in self._base
+        return value is not _DELETED
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        if not self._changes:
+            return iter(self._base)
+        return self._iter_keys()
+
+    def _iter_keys(self):
+        base, changes = self._base, self._changes
+        for key in base:
+            if changes.get(key) is not _DELETED:
+                yield key
+        for key in changes:
+            if key not in base:
+                yield key
+
+    def values(self):
+        if not self._changes:
+            return self._base.values()
+        return super().values()
+
+    def items(self):
+        if not self._changes:
+            return self._base.items()
+        return super().items()
+
+    # ── Escritura ──
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._len += 1
+        self._changes[key] = value
+        self._maybe_compact()
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if key in self._base:
+            self._changes[key] = _DELETED
+        else:
+            del self._changes[key]
+        self._len -= 1
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if len(self._changes) <= max(COMPACT_MIN, isqrt(len(self._base))):
+            return
+        base = dict(self._base)
+        for key, value in self._changes.items():
+            if value is _DELETED:
+                del base[key]
+            else:
+                base[key] = value
+        self._base, self._changes = base, {}
+
+
+def cow(mapping):
+    """Versión de copia al escribir de `mapping` (que deja de modificarse)."""
+    if isinstance(mapping, CowDict):
+        return mapping.copy()
+    return CowDict(mapping)
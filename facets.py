@@ -0,0 +1,157 @@
+from cow import cow
+
+# Posiciones de los bits encendidos en cada valor de byte (para recorrer máscaras)
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+class FacetResult:
+    """Resultado de un filtrado: ids en orden y conteos por faceta."""
+
+    def __init__(self, ids, genre_counts, read_count, unread_count):
+        self.ids = ids
+        self.genre_counts = genre_counts
+        self.read_count = read_count
+        self.unread_count = unread_count
+
+
+class FacetIndex:
+    """Máscaras de bits por género y autor para filtrar el catálogo.
+
+    Cada libro ocupa una posición fija (slot) en el orden del catálogo. Un
+    filtro es la intersección (AND) de las máscaras de cada faceta, y los
+    conteos salen de `int.bit_count` sin recorrer los libros.
+    """
+
+    def __init__(self, books=()):
+        self._slot_of = {}   # {book_id: slot}
+        self._ids = []       # slot -> book_id
+        self._owns_ids = True
+        self._alive = 0      # bits de los libros presentes en el catálogo
+        self._genre_bits = {}
+        self._author_bits = {}
+        self._facets_of = {}  # {book_id: (genre, author)}
+
+        # Carga inicial: se agrupan los slots y cada máscara se construye una sola vez
+        genre_ids, author_ids = {}, {}
+        for book in books:
+            book_id = book["id"]
+            self._slot_of[book_id] = len(self._ids)
+            self._ids.append(book_id)
+            self._facets_of[book_id] = (book["genre"], book["author"])
+            genre_ids.setdefault(book["genre"], []).append(book_id)
+            author_ids.setdefault(book["author"], []).append(book_id)
+        self._alive = (1 << len(self._ids)) - 1
+        self._genre_bits = {genre: self.mask_for_ids(ids) for genre, ids in genre_ids.items()}
+        self._author_bits = {author: self.mask_for_ids(ids) for author, ids in author_ids.items()}
+
+    def copy(self):
+        """Copia independiente: las máscaras son enteros y las tablas se copian al escribir."""
+        index = FacetIndex.__new__(FacetIndex)
+        index._slot_of = cow(self._slot_of)
+        index._ids = self._ids
+        index._owns_ids = False
+        index._alive = self._alive
+        index._genre_bits = cow(self._genre_bits)
+        index._author_bits = cow(self._author_bits)
+        index._facets_of = cow(self._facets_of)
+        return index
+
+    def add(self, book):
+        book_id = book["id"]
+        self.remove(book_id)
+        slot = self._slot_of.get(book_id)
+        if slot is None:
+            slot = self._slot_of[book_id] = len(self._ids)
+            if not self._owns_ids:
+                self._ids = list(self._ids)
+                self._owns_ids = True
+            self._ids.append(book_id)
+        bit = 1 << slot
+        self._alive |= bit
+        self._genre_bits[book["genre"]] = self._genre_bits.get(book["genre"], 0) | bit
+        self._author_bits[book["author"]] = self._author_bits.get(book["author"], 0) | bit
+        self._facets_of[book_id] = (book["genre"], book["author"])
+
+    def remove(self, book_id):
+        # El slot se conserva para que el libro recupere su posición si vuelve
+        facets = self._facets_of.pop(book_id, None)
+        if facets is None:
+            return
+        bit = 1 << self._slot_of[book_id]
+        self._alive &= ~bit
+        for index, key in ((self._genre_bits, facets[0]), (self._author_bits, facets[1])):
+            index[key] &= ~bit
+            if not index[key]:
+                del index[key]
+
+    def mask_for_ids(self, book_ids):
+        """Máscara con los bits de los ids indicados (los desconocidos se ignoran)."""
+        buffer = bytearray((len(self._ids) + 7) // 8)
+        for book_id in book_ids:
+            slot = self._slot_of.get(book_id)
+            if slot is not None:
+                buffer[slot >> 3] |= 1 << (slot & 7)
+        return int.from_bytes(buffer, "little") & self._alive
+
+    def ids_in(self, mask):
+        """Ids de los bits encendidos de la máscara, en orden del catálogo."""
+        ids = self._ids
+        result = []
+        for byte_index, value in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+            if value:
+                base = byte_index << 3
+                result.extend(ids[base + bit] for bit in _BYTE_BITS[value])
+        return result
+
+    def filter(self, genres=None, authors=None, read_ids=(), read_state=None, within=None):
+        """Filtra por género, autor y estado de lectura.
+
+        `read_state` es None (todos), "read", "unread" o "none" (ninguno).
+        `within` es una lista opcional de ids (por ejemplo, resultados de
+        búsqueda); si se indica, el resultado respeta su orden.
+        Los conteos por género y de leídos/no leídos ignoran su propio filtro
+        para poder mostrar cuántos libros añadiría cada opción.
+        """
+        base = self._alive
+        if within is not None:
+            base &= self.mask_for_ids(within)
+
+        author_mask = base
+        if authors:
+            author_mask = 0
+            for author in authors:
+                author_mask |= self._author_bits.get(author, 0)
+            author_mask &= base
+
+        genre_mask = self._alive
+        if genres:
+            genre_mask = 0
+            for genre in genres:
+                genre_mask |= self._genre_bits.get(genre, 0)
+
+        read_mask = self.mask_for_ids(read_ids)
+        if read_state == "read":
+            state_mask = read_mask
+        elif read_state == "unread":
+            state_mask = self._alive & ~read_mask
+        elif read_state == "none":
+            state_mask = 0
+        else:
+            state_mask = self._alive
+
+        # Conteos por faceta (cada uno sin aplicar su propio filtro)
+        without_genre = author_mask & state_mask
+        genre_counts = {
+            genre: count for genre, bits in self._genre_bits.items()
+            if (count := (bits & without_genre).bit_count())
+        }
+        without_state = author_mask & genre_mask
+        read_count = (without_state & read_mask).bit_count()
+        unread_count = without_state.bit_count() - read_count
+
+        mask = without_state & state_mask
+        ids = self.ids_in(mask)
+        if within is not None:
+            matching = set(ids)
+            ids = [book_id for book_id in within if book_id in matching]
+        return FacetResult(ids, genre_counts, read_count, unread_count)
@@ -0,0 +1,64 @@
+class IdSource:
+    """Resultado perezoso: una lista ordenada de ids que solo se convierte en
+    libros para las filas de la página pedida."""
+
+    def __init__(self, ids, lookup):
+        self.ids = ids
+        self.lookup = lookup
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fetch(self, start, stop):
+        return [self.lookup(book_id) for book_id in self.ids[start:stop]]
+
+
+class Page:
+    """Una página de resultados. `start` es el cursor (fila) de su primer elemento."""
+
+    def __init__(self, items, number, total_pages, total, start):
+        self.items = items
+        self.number = number
+        self.total_pages = total_pages
+        self.total = total
+        self.start = start
+
+    @property
+    def has_prev(self):
+        return self.number > 1
+
+    @property
+    def has_next(self):
+        return self.number < self.total_pages
+
+    @property
+    def next_cursor(self):
+        return self.start + len(self.items) if self.has_next else None
+
+
+class Paginator:
+    """Paginación sobre un origen con acceso aleatorio (`len` y `fetch(start, stop)`).
+
+    Saltar a cualquier página o cursor es O(1) más el tamaño de la página: no
+    se recorren ni se materializan las filas anteriores.
+    """
+
+    def __init__(self, source, page_size=9):
+        self.source = source
+        self.page_size = page_size
+        self.total = len(source)
+        self.total_pages = (self.total + page_size - 1) // page_size
+
+    def clamp(self, number):
+        return min(max(number, 1), max(self.total_pages, 1))
+
+    def page(self, number):
+        """Página `number` (empezando en 1), ajustada al rango válido."""
+        number = self.clamp(number)
+        start = (number - 1) * self.page_size
+        items = self.source.fetch(start, min(start + self.page_size, self.total))
+        return Page(items, number, self.total_pages, self.total, start)
+
+    def page_at(self, cursor):
+        """Página que contiene la fila `cursor` (p. ej. el `next_cursor` de otra página)."""
+        return self.page(cursor // self.page_size + 1)
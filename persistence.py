@@ -0,0 +1,54 @@
+import atexit
+import json
+import threading
+
+# Ventana (segundos) en la que se agrupan los cambios antes de escribir
+DEFAULT_DELAY = 1.0
+
+
+class DebouncedWriter:
+    """Agrupa los guardados de datos del usuario en una escritura por ventana.
+
+    Mover un slider o un contador genera varios cambios seguidos del mismo
+    libro; en lugar de escribir cada uno, se guarda una copia del último
+    estado y se escribe una sola vez `delay` segundos después del primer
+    cambio. Lo pendiente se escribe también con `flush` y al cerrar el proceso.
+    """
+
+    def __init__(self, storage, delay=DEFAULT_DELAY):
+        self.storage = storage
+        self.delay = delay
+        self.writes = 0                # escrituras reales (para medir el ahorro)
+        self._lock = threading.Lock()
+        self._pending = {}             # {id(user_data): (almacenamiento, copia del último estado, ids de libros)}
+        self._timer = None
+        atexit.register(self.flush)
+
+    def save_user_book(self, user_data, book_id, storage=None):
+        """Programa el guardado de un libro; `storage` permite elegir el del perfil."""
+        # Copia: la sesión puede seguir modificando user_data mientras se escribe
+        snapshot = json.loads(json.dumps(user_data))
+        with self._lock:
+            _, _, book_ids = self._pending.get(id(user_data), (None, None, set()))
+            book_ids.add(int(book_id))
+            self._pending[id(user_data)] = (storage or self.storage, snapshot, book_ids)
+            if self.delay <= 0:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Escribe ya los cambios pendientes (si los hay)."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        for storage, user_data, book_ids in pending.values():
+            storage.save_user_books(user_data, sorted(book_ids))
+            self.writes += 1
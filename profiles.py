@@ -0,0 +1,59 @@
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Perfil usado cuando no se indica ninguno (son los datos de siempre)
+DEFAULT_PROFILE = "default"
+# Perfiles con almacenamiento abierto a la vez en el proceso
+MAX_HOT_PROFILES = 32
+
+_PROFILE_RE = re.compile(r"[^a-z0-9_-]+")
+
+
+def profile_id(name):
+    """Normaliza un nombre de perfil a un id seguro para nombres de archivo."""
+    # Sin acentos: "Ana López" -> "ana-lopez"
+    name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    clean = _PROFILE_RE.sub("-", name.strip().lower()).strip("-")[:40]
+    return clean or DEFAULT_PROFILE
+
+
+class ProfileStore:
+    """Almacenamiento de datos de usuario repartido por perfil (un shard por perfil).
+
+    `factory(profile)` crea el almacenamiento de un perfil (su propio archivo
+    o base de datos, con su propio lock), así que sesiones de perfiles
+    distintos nunca esperan unas a otras. Los perfiles usados recientemente
+    se mantienen abiertos en una caché LRU de hasta `max_profiles`; al
+    expulsar uno se llama a `on_evict(storage)` para escribir lo pendiente
+    (la conexión se cierra cuando deja de usarse).
+    """
+
+    def __init__(self, factory, max_profiles=MAX_HOT_PROFILES, on_evict=None):
+        self.factory = factory
+        self.max_profiles = max_profiles
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        self._hot = OrderedDict()  # {perfil: almacenamiento}, del menos al más reciente
+
+    def get(self, profile):
+        with self._lock:
+            storage = self._hot.get(profile)
+            if storage is not None:
+                self._hot.move_to_end(profile)
+                return storage
+            storage = self._hot[profile] = self.factory(profile)
+            # Se expulsa con el lock tomado: el perfil no puede reabrirse
+            # mientras aún se escriben sus cambios pendientes
+            while len(self._hot) > self.max_profiles:
+                _, old = self._hot.popitem(last=False)
+                if self.on_evict:
+                    self.on_evict(old)
+            return storage
+
+    def __contains__(self, profile):
+        return profile in self._hot
+
+    def __len__(self):
+        return len(self._hot)
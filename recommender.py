@@ -0,0 +1,121 @@
+import numpy as np
+
+# Pesos de la puntuación de afinidad
+GENRE_WEIGHT = 1.0
+AUTHOR_WEIGHT = 0.5
+YEAR_WEIGHT = 0.1
+PAGES_WEIGHT = 0.05
+
+# Calificación a partir de la cual un libro cuenta como "favorito"
+FAVORITE_RATING = 4
+# Calificación neutra: por debajo resta afinidad, por encima suma
+NEUTRAL_RATING = 3
+
+
+class RecommendationScorer:
+    """Recomendador vectorizado sobre columnas NumPy del catálogo.
+
+    Convierte el catálogo en arreglos (id, código de género, código de autor,
+    año y páginas) una sola vez y puntúa todos los libros con operaciones
+    vectoriales; el top-k sale de `argpartition` sin ordenar todo el catálogo.
+    """
+
+    def __init__(self, books):
+        books = list(books)
+        self._books = books
+        self.ids = np.fromiter((b["id"] for b in books), dtype=np.int64, count=len(books))
+        self.genres, self.genre_codes = self._encode([b["genre"] for b in books])
+        self.authors, self.author_codes = self._encode([b["author"] for b in books])
+        self.years = np.fromiter((b["year"] for b in books), dtype=np.float64, count=len(books))
+        self.pages = np.fromiter((b["pages"] for b in books), dtype=np.float64, count=len(books))
+        self._position = {book_id: i for i, book_id in enumerate(self.ids.tolist())}
+
+    @staticmethod
+    def _encode(values):
+        codes = {}
+        encoded = np.fromiter((codes.setdefault(v, len(codes)) for v in values), dtype=np.int32, count=len(values))
+        return codes, encoded
+
+    def recommend(self, user_data, limit=5, compat=False):
+        """Devuelve hasta `limit` libros no leídos ordenados por afinidad.
+
+        Con `compat=True` reproduce el orden de la versión anterior: géneros
+        favoritos por suma de calificaciones altas y, dentro de cada género,
+        el orden del catálogo; después el resto de libros no leídos.
+        """
+        return [self._books[i] for i in self._rank(user_data, limit, compat)]
+
+    def recommend_ids(self, user_data, limit=5, compat=False):
+        """Como `recommend`, pero solo los ids (sin materializar los libros)."""
+        return self.ids[self._rank(user_data, limit, compat)].tolist()
+
+    def _rank(self, user_data, limit, compat):
+        """Posiciones en el catálogo de los libros recomendados, en orden."""
+        read_books = user_data.get("read_books", [])
+        if not read_books or not len(self.ids):
+            return np.arange(min(limit, len(self.ids)))
+
+        unread = np.ones(len(self.ids), dtype=bool)
+        read_positions = [self._position[b] for b in read_books if b in self._position]
+        unread[read_positions] = False
+
+        ratings = [(self._position[int(book_id)], rating)
+                   for book_id, rating in user_data.get("ratings", {}).items()
+                   if int(book_id) in self._position]
+
+        if compat:
+            scores = self._compat_scores(ratings)
+        else:
+            scores = self._affinity_scores(ratings)
+
+        candidates = np.flatnonzero(unread)
+        k = min(limit, len(candidates))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        candidate_scores = scores[candidates]
+        if k < len(candidates):
+            # Puntuación del k-ésimo mejor; entre empatados ganan los primeros del catálogo
+            threshold = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            better = np.flatnonzero(candidate_scores > threshold)
+            tied = np.flatnonzero(candidate_scores == threshold)[:k - len(better)]
+            top = np.concatenate((better, tied))
+        else:
+            top = np.arange(len(candidates))
+        # Orden final por puntuación y, a igualdad, por posición en el catálogo
+        top = top[np.lexsort((candidates[top], -candidate_scores[top]))]
+        return candidates[top]
+
+    def _compat_scores(self, ratings):
+        # Suma de calificaciones altas por género, en el orden en que aparecen
+        favorite_genres = {}
+        for position, rating in ratings:
+            if rating >= FAVORITE_RATING:
+                code = int(self.genre_codes[position])
+                favorite_genres[code] = favorite_genres.get(code, 0) + rating
+        ranked = sorted(favorite_genres.items(), key=lambda x: x[1], reverse=True)
+
+        # Cada género favorito ocupa un "escalón"; el resto queda por debajo
+        genre_rank = np.full(len(self.genres), len(ranked), dtype=np.float64)
+        for rank, (code, _) in enumerate(ranked):
+            genre_rank[code] = rank
+        return -genre_rank[self.genre_codes]
+
+    def _affinity_scores(self, ratings):
+        genre_affinity = np.zeros(len(self.genres))
+        author_affinity = np.zeros(len(self.authors))
+        if ratings:
+            positions = np.array([p for p, _ in ratings], dtype=np.int64)
+            weights = np.array([r for _, r in ratings], dtype=np.float64) - NEUTRAL_RATING
+            np.add.at(genre_affinity, self.genre_codes[positions], weights)
+            np.add.at(author_affinity, self.author_codes[positions], weights)
+
+        scores = GENRE_WEIGHT * genre_affinity[self.genre_codes] + AUTHOR_WEIGHT * author_affinity[self.author_codes]
+
+        # Cercanía en año y extensión a los libros favoritos
+        liked = [p for p, r in ratings if r >= FAVORITE_RATING]
+        if liked:
+            preferred_year = self.years[liked].mean()
+            preferred_pages = self.pages[liked].mean()
+            scores += YEAR_WEIGHT * np.exp(-np.abs(self.years - preferred_year) / 50)
+            scores += PAGES_WEIGHT * np.exp(-np.abs(self.pages - preferred_pages) / 200)
+        return scores
@@ -0,0 +1,202 @@
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+from cow import cow
+
+# Peso de cada campo al contar apariciones de un término
+FIELD_WEIGHTS = {"title": 3.0, "author": 2.0, "description": 1.0}
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Los prefijos más cortos que esto solo buscan el término exacto
+MIN_PREFIX_LENGTH = 2
+# Máximo de términos en que se expande un prefijo: se eligen los que aparecen en más
+# libros, así que un prefijo muy corto puede dejar fuera palabras raras que empiezan igual
+MAX_PREFIX_EXPANSIONS = 64
+# Mayor carácter Unicode: `prefijo + _MAX_CHAR` queda detrás de todas las palabras con ese prefijo
+_MAX_CHAR = chr(0x10FFFF)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def fold(text):
+    """Pasa a minúsculas y elimina acentos ("Márquez" -> "marquez")."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(fold(text))
+
+
+class SearchIndex:
+    """Índice invertido sobre título, autor y descripción con ranking BM25.
+
+    Se actualiza libro a libro con `add` y `remove`, así que no hace falta
+    reconstruirlo cuando se agrega o edita un libro. `copy` crea una versión
+    que comparte las listas de postings con la original y solo copia las que
+    modifica (la original no cambia).
+    """
+
+    def __init__(self, books=()):
+        self._postings = {}   # {term: {book_id: tf ponderado}}
+        self._doc_terms = {}  # {book_id: {term: tf ponderado}}
+        self._doc_len = {}    # {book_id: longitud ponderada}
+        self._total_len = 0.0
+        self._terms = []      # términos ordenados para búsqueda por prefijo
+        self._owned = None    # términos con postings propios (None: todos, índice no copiado)
+        self._owns_terms = True
+        for book in books:
+            self._add(book, keep_sorted=False)
+        # En la carga inicial se ordenan los términos una sola vez
+        self._terms = sorted(self._postings)
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def copy(self):
+        """Copia que comparte los postings; cada lista se copia al modificarla."""
+        index = SearchIndex.__new__(SearchIndex)
+        index._postings = cow(self._postings)
+        index._doc_terms = cow(self._doc_terms)
+        index._doc_len = cow(self._doc_len)
+        index._total_len = self._total_len
+        index._terms = self._terms
+        index._owned = set()
+        index._owns_terms = False
+        return index
+
+    def _own(self, term):
+        # Copia al escribir: los postings compartidos con otra versión no se modifican
+        postings = self._postings[term]
+        if self._owned is not None and term not in self._owned:
+            postings = self._postings[term] = cow(postings)
+            self._owned.add(term)
+        return postings
+
+    def _own_terms(self):
+        # La lista de términos también se comparte hasta que cambia
+        if not self._owns_terms:
+            self._terms = list(self._terms)
+            self._owns_terms = True
+        return self._terms
+
+    def add(self, book):
+        self._add(book, keep_sorted=True)
+
+    def _add(self, book, keep_sorted):
+        book_id = book["id"]
+        if book_id in self._doc_terms:
+            self.remove(book_id)
+
+        terms = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(str(book.get(field, ""))):
+                terms[token] = terms.get(token, 0.0) + weight
+
+        for term, tf in terms.items():
+            if term in self._postings:
+                postings = self._own(term)
+            else:
+                postings = self._postings[term] = {}
+                if self._owned is not None:
+                    self._owned.add(term)
+                if keep_sorted:
+                    insort(self._own_terms(), term)
+            postings[book_id] = tf
+
+        length = sum(terms.values())
+        self._doc_terms[book_id] = terms
+        self._doc_len[book_id] = length
+        self._total_len += length
+
+    def remove(self, book_id):
+        terms = self._doc_terms.pop(book_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._own(term)
+            del postings[book_id]
+            if not postings:
+                del self._postings[term]
+                terms_list = self._own_terms()
+                del terms_list[bisect_left(terms_list, term)]
+        self._total_len -= self._doc_len.pop(book_id)
+
+    def search(self, query, limit=None):
+        """Devuelve los ids que contienen todos los términos de la consulta, por relevancia.
+
+        Cada término de la consulta también encuentra las palabras que empiezan
+        por él, para que la búsqueda funcione mientras se escribe. Con `limit`
+        solo se devuelven los `limit` más relevantes (top-k acotado).
+        """
+        tokens = tokenize(query)
+        if not tokens or not self._doc_len:
+            return []
+
+        # Listas de postings de cada término de la consulta (ya expandido por prefijo)
+        token_postings = []
+        for token in dict.fromkeys(tokens):
+            postings = [self._postings[term] for term in self._expand(token)]
+            if not postings:
+                return []
+            token_postings.append(postings)
+
+        # Intersección empezando por el término más raro: solo se puntúan los candidatos
+        token_postings.sort(key=lambda postings: sum(len(p) for p in postings))
+        candidates = set().union(*token_postings[0])
+        for postings in token_postings[1:]:
+            if len(postings) == 1:
+                # Intersección en C: recorre el más corto de los dos
+                candidates = postings[0].keys() & candidates
+            else:
+                candidates = {book_id for book_id in candidates if any(book_id in p for p in postings)}
+            if not candidates:
+                return []
+
+        n_docs = len(self._doc_len)
+        doc_len = self._doc_len
+        # norm = BM25_K1 * (1 - BM25_B + BM25_B * longitud / longitud media)
+        norm_base = BM25_K1 * (1 - BM25_B)
+        norm_per_len = BM25_K1 * BM25_B * n_docs / self._total_len
+        scores = dict.fromkeys(candidates, 0.0)
+        for postings in token_postings:
+            for term_postings in postings:
+                idf = math.log(1 + (n_docs - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                weight = idf * (BM25_K1 + 1)
+                # Se recorre la lista más corta: los postings del término o los candidatos
+                if len(term_postings) <= len(scores):
+                    for book_id, tf in term_postings.items():
+                        if book_id in scores:
+                            scores[book_id] += weight * tf / (tf + norm_base + norm_per_len * doc_len[book_id])
+                else:
+                    for book_id in candidates:
+                        tf = term_postings.get(book_id)
+                        if tf is not None:
+                            scores[book_id] += weight * tf / (tf + norm_base + norm_per_len * doc_len[book_id])
+
+        # A igual puntuación, primero el id menor
+        if limit is None or limit >= len(scores):
+            return sorted(scores, key=lambda book_id: (-scores[book_id], book_id))
+        # Top-k acotado: O(n log k) en lugar de ordenar todas las coincidencias
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [book_id for book_id, _ in top]
+
+    def _expand(self, token):
+        if len(token) < MIN_PREFIX_LENGTH:
+            return [token] if token in self._postings else []
+        start = bisect_left(self._terms, token)
+        end = bisect_left(self._terms, token + _MAX_CHAR, start)
+        if end - start <= MAX_PREFIX_EXPANSIONS:
+            return self._terms[start:end]
+        # Demasiadas palabras con ese prefijo: las que aparecen en más libros
+        return heapq.nlargest(MAX_PREFIX_EXPANSIONS, self._terms[start:end],
+                              key=lambda term: len(self._postings[term]))
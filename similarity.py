@@ -0,0 +1,249 @@
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from cow import cow
+from search import tokenize
+
+# Dimensión de los vectores de características (feature hashing)
+DIM = 256
+# Peso de cada campo al construir el vector
+GENRE_WEIGHT = 3.0
+AUTHOR_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+# Si cambia más de esta fracción del catálogo, se reconstruye el índice completo
+REBUILD_RATIO = 0.2
+# Filas por bloque de la matriz: una edición solo copia el bloque que modifica
+BLOCK_ROWS = 1024
+# Fracción de filas eliminadas a partir de la cual se compacta la matriz
+COMPACT_RATIO = 0.25
+
+
+def _bucket(feature):
+    return zlib.crc32(feature.encode("utf-8")) % DIM
+
+
+def _features(book):
+    """(bucket, peso) de cada característica: palabras de la descripción, género y autor."""
+    features = [(_bucket(token), DESCRIPTION_WEIGHT) for token in tokenize(book.get("description", ""))]
+    features.append((_bucket("genre:" + book["genre"].lower()), GENRE_WEIGHT))
+    features.append((_bucket("author:" + book["author"].lower()), AUTHOR_WEIGHT))
+    return features
+
+
+def _checksum(book):
+    text = f"{book['genre']}\x1f{book['author']}\x1f{book.get('description', '')}"
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class SimilarityIndex:
+    """Vectores TF-IDF (con feature hashing) de descripción, género y autor.
+
+    Las consultas "libros similares" son productos punto contra la matriz
+    normalizada, con el top-k por `argpartition`. El índice se guarda en disco
+    con una suma de control por libro: al arrancar solo se recalculan los
+    libros que cambiaron.
+
+    La matriz se guarda en bloques de BLOCK_ROWS filas. `copy` comparte los
+    bloques con el original y cada edición copia solo el bloque que toca; los
+    libros eliminados quedan marcados con id -1 hasta que se compacta.
+
+    Memoria: la matriz ocupa libros × DIM × 4 bytes (unos 0,5 GB con 500.000
+    libros) y hay una sola por proceso: todas las versiones del catálogo y
+    todas las sesiones comparten sus bloques, y cada versión nueva solo
+    añade los bloques que modificó (BLOCK_ROWS × DIM × 4 bytes = 1 MB cada
+    uno) hasta que las versiones antiguas dejan de usarse. Además solo se
+    carga cuando se piden libros parecidos (`Catalog.similarity`).
+    """
+
+    def __init__(self, ids, vectors, idf, checksums):
+        self.ids = ids
+        self.idf = idf
+        self.checksums = checksums
+        self._blocks = [vectors[start:start + BLOCK_ROWS] for start in range(0, len(vectors), BLOCK_ROWS)]
+        self._owned = None       # bloques propios (None: todos, índice no copiado)
+        self._owns_arrays = True  # ids y checksums propios
+        self._dead = 0           # filas de libros eliminados
+        self._row = {book_id: row for row, book_id in enumerate(ids.tolist()) if book_id >= 0}
+
+    def __len__(self):
+        return len(self._row)
+
+    @property
+    def vectors(self):
+        """Matriz completa (une los bloques; solo para guardar o reconstruir)."""
+        if not self._blocks:
+            return np.zeros((0, DIM), dtype=np.float32)
+        return np.vstack(self._blocks)
+
+    def copy(self):
+        """Copia que comparte los bloques de la matriz; cada bloque se copia al modificarlo."""
+        index = SimilarityIndex.__new__(SimilarityIndex)
+        index.ids, index.idf, index.checksums = self.ids, self.idf, self.checksums
+        index._blocks = list(self._blocks)
+        index._owned = set()
+        index._owns_arrays = False
+        index._dead = self._dead
+        index._row = cow(self._row)
+        return index
+
+    # ── Construcción y persistencia ──
+    @classmethod
+    def build(cls, books):
+        books = list(books)
+        counts = np.zeros((len(books), DIM), dtype=np.float32)
+        for row, book in enumerate(books):
+            for bucket, weight in _features(book):
+                counts[row, bucket] += weight
+        df = np.count_nonzero(counts, axis=0)
+        idf = np.log((1 + len(books)) / (1 + df)).astype(np.float32) + 1
+        ids = np.array([b["id"] for b in books], dtype=np.int64)
+        checksums = np.array([_checksum(b) for b in books], dtype=np.uint32)
+        return cls(ids, cls._normalize(counts * idf), idf, checksums)
+
+    @classmethod
+    def load_or_build(cls, books, path):
+        """Carga el índice de `path`, actualiza los libros cambiados y lo guarda si hizo falta."""
+        books = list(books)
+        path = Path(path)
+        if not path.exists():
+            index = cls.build(books)
+            index.save(path)
+            return index
+
+        with np.load(path) as data:
+            stored_ids, stored_vectors, idf, stored_checksums = (
+                data["ids"], data["vectors"], data["idf"], data["checksums"])
+        stored_row = {book_id: row for row, book_id in enumerate(stored_ids.tolist())}
+
+        rows = np.empty(len(books), dtype=np.int64)
+        stale = []
+        for i, book in enumerate(books):
+            row = stored_row.get(book["id"], -1)
+            rows[i] = row
+            if row < 0 or stored_checksums[row] != _checksum(book):
+                stale.append(i)
+
+        if len(stale) > REBUILD_RATIO * max(len(books), 1):
+            index = cls.build(books)
+            index.save(path)
+            return index
+
+        ids = np.array([b["id"] for b in books], dtype=np.int64)
+        vectors = stored_vectors[np.clip(rows, 0, None)] if len(stored_ids) else np.zeros((len(books), DIM), np.float32)
+        checksums = stored_checksums[np.clip(rows, 0, None)] if len(stored_ids) else np.zeros(len(books), np.uint32)
+        index = cls(ids, vectors, idf, checksums)
+        for i in stale:
+            index._set_row(i, books[i])
+        if stale or len(books) != len(stored_ids):
+            index.save(path)
+        return index
+
+    def save(self, path):
+        path = Path(path)
+        tmp_path = path.with_suffix(".tmp.npz")
+        live = self.ids >= 0
+        np.savez(tmp_path, ids=self.ids[live], vectors=self.vectors[live], idf=self.idf,
+                 checksums=self.checksums[live])
+        tmp_path.replace(path)
+
+    # ── Actualizaciones incrementales ──
+    def add(self, book):
+        """Añade o reemplaza el vector de un libro (usa el IDF ya calculado)."""
+        row = self._row.get(book["id"])
+        if row is None:
+            row = len(self.ids)
+            # np.append crea arreglos nuevos: no afecta a otras versiones
+            self.ids = np.append(self.ids, np.int64(book["id"]))
+            self.checksums = np.append(self.checksums, np.uint32(0))
+            self._owns_arrays = True
+            new_row = np.zeros((1, DIM), dtype=np.float32)
+            if self._blocks and len(self._blocks[-1]) < BLOCK_ROWS:
+                self._blocks[-1] = np.vstack((self._blocks[-1], new_row))
+            else:
+                self._blocks.append(new_row)
+            if self._owned is not None:
+                self._owned.add(len(self._blocks) - 1)
+            self._row[book["id"]] = row
+        self._set_row(row, book)
+
+    def remove(self, book_id):
+        row = self._row.pop(book_id, None)
+        if row is None:
+            return
+        # La fila queda marcada (id -1) para no mover las demás
+        self._own_arrays()
+        self.ids[row] = -1
+        self._dead += 1
+        if self._dead > COMPACT_RATIO * len(self.ids):
+            self._compact()
+
+    def _compact(self):
+        live = self.ids >= 0
+        self.ids, self.checksums = self.ids[live], self.checksums[live]
+        vectors = self.vectors[live]
+        self._blocks = [vectors[start:start + BLOCK_ROWS] for start in range(0, len(vectors), BLOCK_ROWS)]
+        self._owned = None
+        self._owns_arrays = True
+        self._dead = 0
+        self._row = {book_id: row for row, book_id in enumerate(self.ids.tolist())}
+
+    def _own_arrays(self):
+        if not self._owns_arrays:
+            self.ids, self.checksums = self.ids.copy(), self.checksums.copy()
+            self._owns_arrays = True
+
+    def _own_block(self, block):
+        # Copia al escribir: los bloques compartidos con otra versión no se modifican
+        if self._owned is not None and block not in self._owned:
+            self._blocks[block] = self._blocks[block].copy()
+            self._owned.add(block)
+        return self._blocks[block]
+
+    def _vector(self, row):
+        return self._blocks[row // BLOCK_ROWS][row % BLOCK_ROWS]
+
+    def _set_row(self, row, book):
+        vector = np.zeros(DIM, dtype=np.float32)
+        for bucket, weight in _features(book):
+            vector[bucket] += weight
+        self._own_arrays()
+        self._own_block(row // BLOCK_ROWS)[row % BLOCK_ROWS] = self._normalize(vector * self.idf)
+        self.checksums[row] = _checksum(book)
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    # ── Consultas ──
+    def similar_to_book(self, book_id, limit=5, exclude=()):
+        """Ids de los libros más parecidos a uno dado (sin incluirlo)."""
+        row = self._row.get(book_id)
+        if row is None:
+            return []
+        return self._top(self._vector(row), limit, set(exclude) | {book_id})
+
+    def similar_to_profile(self, book_ids, limit=5, exclude=()):
+        """Ids más parecidos al centroide de varios libros (p. ej. los favoritos)."""
+        rows = [self._row[b] for b in book_ids if b in self._row]
+        if not rows:
+            return []
+        centroid = np.mean([self._vector(row) for row in rows], axis=0)
+        return self._top(centroid, limit, set(exclude) | set(book_ids))
+
+    def _top(self, query, limit, exclude):
+        if not self._blocks:
+            return []
+        scores = np.concatenate([block @ query for block in self._blocks])
+        excluded_rows = [self._row[b] for b in exclude if b in self._row]
+        scores[excluded_rows] = -np.inf
+        if self._dead:
+            scores[self.ids < 0] = -np.inf
+        k = min(limit, len(self._row) - len(excluded_rows))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self.ids[top].tolist()
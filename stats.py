@@ -0,0 +1,104 @@
+import heapq
+from collections import Counter
+
+
+class ReadingStats:
+    """Totales de lectura que se actualizan en O(1) con cada cambio.
+
+    Guarda una copia de los datos de cada libro leído (páginas, género,
+    autor y título) para poder descontarlos aunque el catálogo cambie.
+    """
+
+    def __init__(self, books, user_data):
+        self._read = {}  # {book_id: (pages, genre, author, title)}
+        self._ratings = {}  # {book_id: rating}
+        self.total_pages = 0
+        self.rating_sum = 0
+        self.genre_counts = Counter()
+        self.author_counts = Counter()
+
+        for book_id in user_data.get("read_books", []):
+            book = books.get(book_id)
+            if book:
+                self.mark_read(book)
+        for book_id, rating in user_data.get("ratings", {}).items():
+            self.set_rating(book_id, rating)
+
+    # ── Consultas ──
+    @property
+    def read_count(self):
+        return len(self._read)
+
+    @property
+    def rating_count(self):
+        return len(self._ratings)
+
+    @property
+    def average_rating(self):
+        if not self._ratings:
+            return None
+        return self.rating_sum / len(self._ratings)
+
+    def is_read(self, book_id):
+        return int(book_id) in self._read
+
+    def top_genres(self, n=None):
+        return self.genre_counts.most_common(n)
+
+    def top_authors(self, n=None):
+        return self.author_counts.most_common(n)
+
+    def top_rated(self, n=5):
+        """(título, calificación) de los libros leídos mejor calificados."""
+        rated = ((self._read[book_id][3], rating)
+                 for book_id, rating in self._ratings.items()
+                 if rating > 0 and book_id in self._read)
+        return heapq.nlargest(n, rated, key=lambda x: x[1])
+
+    # ── Actualizaciones ──
+    def mark_read(self, book):
+        book_id = int(book["id"])
+        if book_id in self._read:
+            return
+        self._read[book_id] = (book["pages"], book["genre"], book["author"], book["title"])
+        self.total_pages += book["pages"]
+        self.genre_counts[book["genre"]] += 1
+        self.author_counts[book["author"]] += 1
+
+    def unmark_read(self, book_id):
+        """Quita un libro de los leídos (y su calificación, como hace la app)."""
+        book_id = int(book_id)
+        snapshot = self._read.pop(book_id, None)
+        if snapshot is not None:
+            pages, genre, author, _ = snapshot
+            self.total_pages -= pages
+            self._decrement(self.genre_counts, genre)
+            self._decrement(self.author_counts, author)
+        self.set_rating(book_id, None)
+
+    def set_rating(self, book_id, rating):
+        """Cambia la calificación de un libro; `None` la elimina."""
+        book_id = int(book_id)
+        old = self._ratings.pop(book_id, None)
+        if old is not None:
+            self.rating_sum -= old
+        if rating is not None:
+            self._ratings[book_id] = rating
+            self.rating_sum += rating
+
+    def update_book(self, book):
+        """Refleja la edición de un libro leído (páginas, género, autor o título)."""
+        if int(book["id"]) in self._read:
+            rating = self._ratings.get(int(book["id"]))
+            self.unmark_read(book["id"])
+            self.mark_read(book)
+            self.set_rating(book["id"], rating)
+
+    def remove_book(self, book_id):
+        self.unmark_read(book_id)
+
+    @staticmethod
+    def _decrement(counter, key):
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
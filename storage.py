@@ -0,0 +1,488 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from book import BOOK_FIELDS, Book
+from catalog_io import append_books, is_jsonl, iter_books, write_books
+
+# Claves de user_data que se guardan por libro en tablas propias
+USER_BOOK_KEYS = ("read_books", "ratings", "currently_reading", "finished_books")
+
+# Eventos del diario a partir de los cuales se compacta en segundo plano
+JOURNAL_COMPACT_EVENTS = 200
+
+# Libros leídos de SQLite por consulta al recorrer el catálogo
+BOOKS_BATCH = 5000
+
+
+def _empty_user_data():
+    return {"read_books": [], "ratings": {}}
+
+
+def _write_json_atomic(path, data):
+    """Escribe en un temporal y lo renombra: el archivo nunca queda truncado a medias."""
+    tmp_file = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def _read_jsonl_repairing(path):
+    """Lee un archivo de eventos JSONL y lo deja terminado en un salto de línea.
+
+    Solo la última línea puede estar a medias (una escritura interrumpida): se
+    descarta y se trunca el archivo, para que el siguiente append no quede
+    pegado a ella. Una línea inválida en cualquier otro sitio lanza ValueError.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    events = []
+    with open(path, 'r+b') as f:
+        good = 0  # final de la última línea completa
+        for number, line in enumerate(f, 1):
+            try:
+                event = json.loads(line) if line.strip() else None
+            except json.JSONDecodeError as e:
+                if line.endswith(b"\n"):
+                    raise ValueError(f"Archivo dañado: {path}, línea {number}: {e.msg}") from e
+                # Línea a medias de una escritura interrumpida: se descarta
+                f.truncate(good)
+                break
+            if event is not None:
+                events.append(event)
+            good += len(line)
+            if not line.endswith(b"\n"):
+                # El evento se escribió entero pero faltó el salto de línea
+                f.write(b"\n")
+    return events
+
+
+class JsonStorage:
+    """Almacenamiento original: un archivo JSON para libros y otro para user_data.
+
+    Los libros pueden estar en JSON o en JSONL (según la extensión) y se leen
+    y escriben libro a libro. Las operaciones por libro reescriben el archivo completo.
+    """
+
+    def __init__(self, books_file, user_data_file, progress_file=None):
+        self.books_file = Path(books_file)
+        self.user_data_file = Path(user_data_file)
+        # Registro de progreso: un evento JSON por línea, solo se añade al final
+        self.progress_file = Path(progress_file) if progress_file else self.user_data_file.with_name("progress_log.jsonl")
+
+    def load_books(self):
+        return list(self.iter_books())
+
+    def iter_books(self):
+        return iter_books(self.books_file)
+
+    def save_books(self, books):
+        return write_books(self.books_file, books)
+
+    def save_book(self, books, book):
+        self.save_books(books)
+
+    def add_books(self, books, new_books):
+        # En JSONL los libros nuevos se añaden al final sin reescribir el archivo
+        if is_jsonl(self.books_file):
+            append_books(self.books_file, new_books)
+        else:
+            self.save_books(books)
+
+    def delete_book(self, books, book_id):
+        self.save_books(books)
+
+    def load_user_data(self):
+        if not self.user_data_file.exists():
+            return _empty_user_data()
+        with open(self.user_data_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_user_data(self, user_data):
+        _write_json_atomic(self.user_data_file, user_data)
+
+    def save_user_book(self, user_data, book_id):
+        self.save_user_data(user_data)
+
+    def save_user_books(self, user_data, book_ids):
+        self.save_user_data(user_data)
+
+    def load_progress_events(self):
+        # Una última línea a medias (un append interrumpido) se descarta y se trunca
+        return _read_jsonl_repairing(self.progress_file)
+
+    def append_progress_event(self, event):
+        with open(self.progress_file, 'ab') as f:
+            start = f.tell()
+            try:
+                f.write((json.dumps(event, ensure_ascii=False) + "\n").encode('utf-8'))
+                f.flush()
+            except OSError:
+                # No dejar una línea a medias sobre la que se escribiría el siguiente evento
+                f.truncate(start)
+                raise
+
+
+class JournalStorage(JsonStorage):
+    """Archivos JSON con un diario (write-ahead log) para los datos del usuario.
+
+    Cada cambio de un libro se añade como una línea JSON con el estado
+    completo de ese libro (leído, calificación, progreso, terminado), así que
+    guardar es O(1) y volver a aplicar un evento no cambia nada. Al cargar se
+    aplica el diario sobre la última instantánea (`user_data.json`) ignorando
+    una última línea a medias; cada JOURNAL_COMPACT_EVENTS eventos se escribe
+    una instantánea nueva en segundo plano y se vacía el diario.
+    """
+
+    def __init__(self, books_file, user_data_file, progress_file=None, journal_file=None,
+                 compact_every=JOURNAL_COMPACT_EVENTS):
+        super().__init__(books_file, user_data_file, progress_file)
+        self.journal_file = Path(journal_file) if journal_file else self.user_data_file.with_suffix(".journal.jsonl")
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._state = None       # user_data con todos los eventos aplicados
+        self._pending = 0        # eventos en el diario desde la última instantánea
+        self._compacting = False
+
+    def load_user_data(self):
+        with self._lock:
+            self._recover()
+            # Cada sesión recibe su propia copia
+            return json.loads(json.dumps(self._state))
+
+    def save_user_data(self, user_data):
+        with self._lock:
+            self._state = json.loads(json.dumps(user_data))
+            self._write_snapshot(self._state)
+
+    def save_user_book(self, user_data, book_id):
+        key = str(book_id)
+        event = {
+            "book_id": int(book_id),
+            "read": int(book_id) in user_data.get("read_books", []),
+            **{table: user_data.get(table, {}).get(key) for table in USER_BOOK_KEYS[1:]},
+        }
+        with self._lock:
+            self._recover()
+            with open(self.journal_file, 'ab') as f:
+                start = f.tell()
+                try:
+                    f.write((json.dumps(event, ensure_ascii=False) + "\n").encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                except OSError:
+                    # No dejar una línea a medias sobre la que se escribiría el siguiente evento
+                    f.truncate(start)
+                    raise
+            self._apply(self._state, event)
+            self._pending += 1
+            start_compaction = self._pending >= self.compact_every and not self._compacting
+            self._compacting = self._compacting or start_compaction
+        if start_compaction:
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def save_user_books(self, user_data, book_ids):
+        for book_id in book_ids:
+            self.save_user_book(user_data, book_id)
+
+    def compact(self):
+        """Escribe una instantánea con el estado actual y vacía el diario."""
+        with self._lock:
+            try:
+                if self._state is not None and self._pending:
+                    self._write_snapshot(self._state)
+            finally:
+                self._compacting = False
+
+    def _recover(self):
+        # Instantánea + eventos del diario; se compacta si el diario tenía eventos
+        if self._state is not None:
+            return
+        self._state = super().load_user_data()
+        for event in self._read_journal():
+            self._apply(self._state, event)
+            self._pending += 1
+        if self._pending:
+            self._write_snapshot(self._state)
+
+    @staticmethod
+    def _apply(user_data, event):
+        book_id = event["book_id"]
+        key = str(book_id)
+        read_books = user_data.setdefault("read_books", [])
+        if event["read"] and book_id not in read_books:
+            read_books.append(book_id)
+        elif not event["read"] and book_id in read_books:
+            read_books.remove(book_id)
+        for table in USER_BOOK_KEYS[1:]:
+            value = event.get(table)
+            if value is not None:
+                user_data.setdefault(table, {})[key] = value
+            elif key in user_data.get(table, {}):
+                del user_data[table][key]
+
+    def _read_journal(self):
+        """Lee los eventos del diario y lo deja terminado en un salto de línea.
+
+        Solo la última línea puede estar a medias (una escritura interrumpida):
+        se descarta y se trunca el archivo antes de añadir nada. Una línea
+        inválida en cualquier otro sitio es un diario dañado y lanza ValueError.
+        """
+        return _read_jsonl_repairing(self.journal_file)
+
+    def _write_snapshot(self, user_data):
+        # Si se corta antes de vaciar el diario, al cargar se vuelven a aplicar
+        # eventos idempotentes
+        _write_json_atomic(self.user_data_file, user_data)
+        self.journal_file.unlink(missing_ok=True)
+        self._pending = 0
+
+
+class SqliteStorage:
+    """Almacenamiento SQLite en modo WAL con escrituras por fila.
+
+    Editar un libro, calificarlo o actualizar su progreso solo toca las filas
+    de ese libro en lugar de reescribir todo el archivo.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS books (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        author TEXT NOT NULL,
+        genre TEXT NOT NULL,
+        year INTEGER,
+        description TEXT,
+        pages INTEGER,
+        cover TEXT
+    );
+    CREATE TABLE IF NOT EXISTS read_books (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        book_id INTEGER NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS ratings (
+        book_id INTEGER PRIMARY KEY,
+        rating INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS currently_reading (
+        book_id INTEGER PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS finished_books (
+        book_id INTEGER PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS user_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS progress_events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        book_id INTEGER NOT NULL,
+        pages INTEGER NOT NULL,
+        pages_read INTEGER NOT NULL
+    );
+    """
+
+    def __init__(self, db_file):
+        self.db_file = Path(db_file)
+        self._lock = threading.Lock()
+        # Streamlit atiende cada sesión en su propio hilo: una conexión compartida
+        # protegida por un lock evita abrir una conexión por rerun.
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM books LIMIT 1").fetchone() is None
+
+    # ── Libros ──
+    def load_books(self):
+        return list(self.iter_books())
+
+    def iter_books(self):
+        """Recorre los libros por lotes de BOOKS_BATCH sin tener el lock entre lotes."""
+        last_id = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(BOOK_FIELDS)} FROM books WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, BOOKS_BATCH),
+                ).fetchall()
+            if not rows:
+                return
+            # Las filas siguen el orden de BOOK_FIELDS (una portada NULL queda como clave ausente)
+            yield from (Book(*row) for row in rows)
+            last_id = rows[-1][0]
+
+    def save_books(self, books):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM books")
+            return self._conn.executemany(self._upsert_book_sql(), (self._book_row(b) for b in books)).rowcount
+
+    def save_book(self, books, book):
+        with self._lock, self._conn:
+            self._conn.execute(self._upsert_book_sql(), self._book_row(book))
+
+    def add_books(self, books, new_books):
+        # Una sola transacción para todo el lote
+        with self._lock, self._conn:
+            self._conn.executemany(self._upsert_book_sql(), (self._book_row(b) for b in new_books))
+
+    def delete_book(self, books, book_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM books WHERE id = ?", (int(book_id),))
+
+    @staticmethod
+    def _upsert_book_sql():
+        placeholders = ", ".join("?" for _ in BOOK_FIELDS)
+        updates = ", ".join(f"{field} = excluded.{field}" for field in BOOK_FIELDS[1:])
+        return (f"INSERT INTO books ({', '.join(BOOK_FIELDS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}")
+
+    @staticmethod
+    def _book_row(book):
+        return tuple(book.get(field) for field in BOOK_FIELDS)
+
+    # ── Datos del usuario ──
+    def load_user_data(self):
+        user_data = _empty_user_data()
+        with self._lock:
+            for key, value in self._conn.execute("SELECT key, value FROM user_meta"):
+                user_data[key] = json.loads(value)
+            user_data["read_books"] = [
+                row[0] for row in self._conn.execute("SELECT book_id FROM read_books ORDER BY seq")
+            ]
+            user_data["ratings"] = {
+                str(book_id): rating
+                for book_id, rating in self._conn.execute("SELECT book_id, rating FROM ratings")
+            }
+            for table in ("currently_reading", "finished_books"):
+                rows = self._conn.execute(f"SELECT book_id, data FROM {table}").fetchall()
+                if rows or table in user_data:
+                    user_data[table] = {str(book_id): json.loads(data) for book_id, data in rows}
+        return user_data
+
+    def save_user_data(self, user_data):
+        with self._lock, self._conn:
+            for table in ("read_books", "ratings", "currently_reading", "finished_books", "user_meta"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO read_books (book_id) VALUES (?)",
+                [(int(book_id),) for book_id in user_data.get("read_books", [])]
+            )
+            self._conn.executemany(
+                "INSERT INTO ratings (book_id, rating) VALUES (?, ?)",
+                [(int(book_id), rating) for book_id, rating in user_data.get("ratings", {}).items()]
+            )
+            for table in ("currently_reading", "finished_books"):
+                self._conn.executemany(
+                    f"INSERT INTO {table} (book_id, data) VALUES (?, ?)",
+                    [(int(book_id), json.dumps(data, ensure_ascii=False))
+                     for book_id, data in user_data.get(table, {}).items()]
+                )
+                if table in user_data:
+                    self._set_meta_marker(table)
+            self._conn.executemany(
+                "INSERT INTO user_meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False))
+                 for key, value in user_data.items() if key not in USER_BOOK_KEYS]
+            )
+
+    def save_user_book(self, user_data, book_id):
+        """Sincroniza solo las filas de un libro (leído, calificación y progreso)."""
+        with self._lock, self._conn:
+            self._save_user_book(user_data, book_id)
+
+    def save_user_books(self, user_data, book_ids):
+        """Como `save_user_book` para varios libros, en una sola transacción."""
+        with self._lock, self._conn:
+            for book_id in book_ids:
+                self._save_user_book(user_data, book_id)
+
+    def _save_user_book(self, user_data, book_id):
+        book_id = int(book_id)
+        key = str(book_id)
+        if book_id in user_data.get("read_books", []):
+            self._conn.execute("INSERT OR IGNORE INTO read_books (book_id) VALUES (?)", (book_id,))
+        else:
+            self._conn.execute("DELETE FROM read_books WHERE book_id = ?", (book_id,))
+
+        rating = user_data.get("ratings", {}).get(key)
+        if rating is None:
+            self._conn.execute("DELETE FROM ratings WHERE book_id = ?", (book_id,))
+        else:
+            self._conn.execute(
+                "INSERT INTO ratings (book_id, rating) VALUES (?, ?) "
+                "ON CONFLICT(book_id) DO UPDATE SET rating = excluded.rating",
+                (book_id, rating)
+            )
+
+        for table in ("currently_reading", "finished_books"):
+            data = user_data.get(table, {}).get(key)
+            if data is None:
+                self._conn.execute(f"DELETE FROM {table} WHERE book_id = ?", (book_id,))
+            else:
+                self._conn.execute(
+                    f"INSERT INTO {table} (book_id, data) VALUES (?, ?) "
+                    "ON CONFLICT(book_id) DO UPDATE SET data = excluded.data",
+                    (book_id, json.dumps(data, ensure_ascii=False))
+                )
+            if table in user_data:
+                self._set_meta_marker(table)
+
+    # ── Registro de progreso (solo se añaden filas) ──
+    def load_progress_events(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, book_id, pages, pages_read FROM progress_events ORDER BY seq"
+            ).fetchall()
+        return [dict(zip(("date", "book_id", "pages", "pages_read"), row)) for row in rows]
+
+    def append_progress_event(self, event):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO progress_events (date, book_id, pages, pages_read) VALUES (?, ?, ?, ?)",
+                (event["date"], event["book_id"], event["pages"], event["pages_read"])
+            )
+
+    def _set_meta_marker(self, table):
+        # Recuerda que la clave existe aunque su diccionario esté vacío
+        self._conn.execute(
+            "INSERT OR IGNORE INTO user_meta (key, value) VALUES (?, '{}')", (table,)
+        )
+
+
+def import_json(storage, books_file, user_data_file):
+    """Importa de una sola vez los archivos JSON existentes a otro almacenamiento."""
+    source = JsonStorage(books_file, user_data_file)
+    count = storage.save_books(source.iter_books())
+    storage.save_user_data(source.load_user_data())
+    for event in source.load_progress_events():
+        storage.append_progress_event(event)
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Importa data/*.json a la base de datos SQLite.")
+    parser.add_argument("--books", default="data/books.json")
+    parser.add_argument("--user-data", default="data/user_data.json")
+    parser.add_argument("--db", default="data/libros.db")
+    args = parser.parse_args()
+
+    count = import_json(SqliteStorage(args.db), args.books, args.user_data)
+    print(f"Importados {count} libros en {args.db}")
@@ -0,0 +1,125 @@
+import pandas as pd
+
+# Texto de la columna "Calificación" para cada valor (0 = sin calificar)
+RATING_LABELS = ["Sin calificar"] + ["⭐" * rating for rating in range(1, 6)]
+
+
+def _categorical(values, categories=None):
+    return pd.Categorical(values, categories=categories)
+
+
+class ReadingTables:
+    """Proyección en columnas (DataFrames) de los libros leídos y terminados.
+
+    Se construye una vez por sesión, con género y autor como categorías y las
+    fechas ya convertidas, y se actualiza con cada evento (leído, calificación,
+    terminado) en lugar de reconstruirse en cada rerun. Las pestañas solo
+    seleccionan columnas de estas tablas.
+    """
+
+    def __init__(self, books, user_data):
+        ratings = user_data.get("ratings", {})
+        # Solo se buscan los leídos (por id, el orden del catálogo) en lugar de recorrer el catálogo
+        read_books = (books.get(book_id) for book_id in sorted(set(user_data.get("read_books", []))))
+        read_rows = [self._read_row(book, ratings.get(str(book["id"]), 0)) for book in read_books if book]
+        self.read = self._read_frame(read_rows)
+
+        finished_rows = []
+        for book_id, finish_data in user_data.get("finished_books", {}).items():
+            book = books.get(book_id)
+            if book:
+                finished_rows.append(self._finished_row(book, finish_data))
+        self.finished = self._finished_frame(finished_rows)
+
+    # ── Construcción de filas y tablas ──
+    @staticmethod
+    def _read_row(book, rating):
+        return (book["id"], book["title"], book["author"], book["genre"], book["year"], book["pages"], rating)
+
+    @staticmethod
+    def _finished_row(book, finish_data):
+        return (book["id"], book["title"], book["author"], book["pages"],
+                finish_data.get("start_date"), finish_data.get("finish_date"))
+
+    @staticmethod
+    def _read_frame(rows):
+        ids, titles, authors, genres, years, pages, ratings = zip(*rows) if rows else ((),) * 7
+        return pd.DataFrame({
+            "Título": pd.Series(titles, dtype="string"),
+            "Autor": _categorical(authors),
+            "Género": _categorical(genres),
+            "Año": pd.Series(years, dtype="int32"),
+            "Páginas": pd.Series(pages, dtype="int32"),
+            "Calificación": pd.Categorical.from_codes(list(ratings), categories=RATING_LABELS),
+        }).set_axis(pd.Index(ids, dtype="int64", name="id"))
+
+    @staticmethod
+    def _finished_frame(rows):
+        ids, titles, authors, pages, starts, finishes = zip(*rows) if rows else ((),) * 6
+        start = pd.to_datetime(pd.Series(starts, dtype="object"), format="%Y-%m-%d", errors="coerce")
+        finish = pd.to_datetime(pd.Series(finishes, dtype="object"), format="%Y-%m-%d", errors="coerce")
+        return pd.DataFrame({
+            "Título": pd.Series(titles, dtype="string"),
+            "Autor": _categorical(authors),
+            "Páginas": pd.Series(pages, dtype="int32"),
+            "Inicio": start,
+            "Fin": finish,
+            "Días": ((finish - start).dt.days + 1).astype("Int32"),
+        }).set_axis(pd.Index(ids, dtype="int64", name="id"))
+
+    @staticmethod
+    def _upsert(table, book_id, row_frame, keep_sorted):
+        """Inserta o reemplaza la fila `book_id` conservando los tipos de las columnas."""
+        if book_id in table.index:
+            table = table.drop(index=book_id)
+        if table.empty:
+            return row_frame
+        table = pd.concat([table, row_frame])
+        for column in ("Autor", "Género"):
+            if column in table:
+                table[column] = table[column].astype("category")
+        return table.sort_index() if keep_sorted else table
+
+    # ── Eventos ──
+    def mark_read(self, book, rating=0):
+        # Los leídos se muestran en el orden del catálogo (por id)
+        row = self._read_frame([self._read_row(book, rating)])
+        self.read = self._upsert(self.read, book["id"], row, keep_sorted=True)
+
+    def unmark_read(self, book_id):
+        self.read = self.read.drop(index=int(book_id), errors="ignore")
+
+    def set_rating(self, book_id, rating):
+        book_id = int(book_id)
+        if book_id in self.read.index:
+            self.read.loc[book_id, "Calificación"] = RATING_LABELS[rating or 0]
+
+    def finish(self, book, finish_data):
+        row = self._finished_frame([self._finished_row(book, finish_data)])
+        self.finished = self._upsert(self.finished, book["id"], row, keep_sorted=False)
+
+    def update_book(self, book, user_data):
+        """Refleja la edición de un libro (título, autor, género, año o páginas)."""
+        book_id = book["id"]
+        if book_id in self.read.index:
+            self.mark_read(book, user_data.get("ratings", {}).get(str(book_id), 0))
+        finish_data = user_data.get("finished_books", {}).get(str(book_id))
+        if finish_data is not None and book_id in self.finished.index:
+            # El historial conserva su orden (el de terminación)
+            order = self.finished.index
+            self.finish(book, finish_data)
+            self.finished = self.finished.reindex(order)
+
+    def remove_book(self, book_id):
+        self.unmark_read(book_id)
+        self.finished = self.finished.drop(index=int(book_id), errors="ignore")
+
+    # ── Consultas ──
+    def reading_speed(self):
+        """(promedio de días, páginas terminadas, páginas por día) de los libros con fechas."""
+        valid = self.finished[self.finished["Días"].notna()]
+        if valid.empty:
+            return None
+        days = int(valid["Días"].sum())
+        pages = int(valid["Páginas"].sum())
+        return days / len(valid), pages, pages / days if days > 0 else 0
@@ -1,5 +1,8 @@
 import streamlit as st
-from utils import save_books
+from utils import add_book, import_books
+
+# Registros con errores que se muestran tras una importación en lote
+MAX_ERRORS_SHOWN = 20
 
 
 def render(books):
@@ -18,7 +21,7 @@ def render(books):
 
         with col2:
             # Obtener géneros únicos existentes
-            existing_genres = sorted(list(set([book["genre"] for book in books])))
+            existing_genres = books.genres()
 
             genre_option = st.radio("🏷️ Género", ["Seleccionar existente", "Crear nuevo"])
 
@@ -45,13 +48,8 @@ def render(books):
             if not new_title or not new_author or not new_genre or not new_description:
                 st.error("⚠️ Por favor, completa todos los campos obligatorios.")
             else:
-                # Obtener el ID más alto y sumar 1
-                max_id = max([book["id"] for book in books]) if books else 0
-                new_id = max_id + 1
-
-                # Crear el nuevo libro
+                # Crear el nuevo libro (el id lo asigna el catálogo al guardarlo)
                 new_book = {
-                    "id": new_id,
                     "title": new_title.strip(),
                     "author": new_author.strip(),
                     "genre": new_genre.strip(),
@@ -66,12 +64,36 @@ def render(books):
                 else:
                     new_book["cover"] = "https://via.placeholder.com/300x450/667eea/ffffff?text=Sin+Portada"
 
-                # Agregar a la lista de libros
-                books.append(new_book)
-
-                # Guardar en el archivo
-                save_books(books)
+                # Agregar al catálogo compartido y guardar
+                add_book(new_book)
 
                 st.success(f"✅ ¡Libro '{new_title}' agregado exitosamente!")
                 st.balloons()
                 st.info("💡 Recarga la página para ver el nuevo libro en la biblioteca.")
+
+    st.divider()
+
+    # ── Importación en lote ──
+    st.subheader("📥 Importar Libros en Lote")
+    st.write(
+        "Sube un archivo CSV o JSONL con las columnas title, author, genre, year, description, "
+        "pages y cover (opcional). También se aceptan los nombres en español (titulo, autor, ...)."
+    )
+
+    uploaded_file = st.file_uploader("Archivo de libros", type=["csv", "jsonl"], key="bulk_import_file")
+
+    if uploaded_file is not None and st.button("📥 Importar Libros", type="primary", key="bulk_import_btn"):
+        with st.spinner("Validando e importando libros..."):
+            result = import_books(uploaded_file, uploaded_file.name)
+
+        st.success(
+            f"✅ {len(result.added)} libros importados "
+            f"({result.duplicates} repetidos, {len(result.errors)} con errores) "
+            f"en {result.seconds:.2f} s: {result.books_per_second:,.0f} libros/s"
+        )
+        if result.errors:
+            with st.expander(f"⚠️ Registros con errores ({len(result.errors)})"):
+                for line, error in result.errors[:MAX_ERRORS_SHOWN]:
+                    st.write(f"Línea {line}: {error}")
+        if result.added:
+            st.info("💡 Recarga la página para ver los nuevos libros en la biblioteca.")
@@ -1,6 +1,17 @@
 import streamlit as st
-import google.generativeai as genai
-from utils import save_api_key
+import time
+from itertools import islice
+from utils import save_api_key, generate_text, get_gemini_model, stream_text
+
+
+def _timed(chunks, metrics):
+    """Reenvía los fragmentos midiendo el tiempo hasta el primero y el total."""
+    start = time.perf_counter()
+    for chunk in chunks:
+        if "first_token" not in metrics:
+            metrics["first_token"] = time.perf_counter() - start
+        yield chunk
+    metrics["total"] = time.perf_counter() - start
 
 
 def render(books):
@@ -38,13 +49,9 @@ def render(books):
     
     st.divider()
 
-    # Inicializar el cliente Gemini
+    # El cliente Gemini se crea (y se reutiliza) solo al hacer una pregunta
     if st.session_state.gemini_api_key:
         try:
-            # Configurar la API key
-            genai.configure(api_key=st.session_state.gemini_api_key)
-            model = genai.GenerativeModel('gemini-2.0-flash')
-
             # Input del usuario
             st.markdown("""
             <div style="
@@ -61,42 +68,64 @@ def render(books):
             user_query = st.text_area(
                 "¿Cómo puede ayudarte Libri hoy?",
                 placeholder="Ejemplo: Recomiéndame libros de ciencia ficción similares a Dune...",
-                height=100
+                height=100,
+                key="chat_query"
             )
 
             col1, col2 = st.columns([1, 5])
             with col1:
                 ask_button = st.button(" Preguntar", type="primary", use_container_width=True)
+            with col2:
+                stream_mode = st.toggle("⚡ Mostrar la respuesta mientras se genera", key="chat_stream_mode")
 
             if ask_button:
                 if user_query:
-                    with st.spinner(" Conchita está pensando..."):
-                        try:
-                            # Crear contexto con los libros de la biblioteca
-                            books_context = f"\n\nContexto: Tengo acceso a una biblioteca con {len(books)} libros. "
-                            books_context += "Algunos géneros disponibles: " + ", ".join(set([b['genre'] for b in books[:10]]))
-
-                            # Llamar a Gemini
-                            response = model.generate_content(user_query + books_context)
-
-                            # Mostrar resultados con estilo
-                            st.markdown("""
-                            <div style="
-                                background-color: #f8f9fa;
-                                border-left: 4px solid #667eea;
-                                padding: 20px;
-                                border-radius: 8px;
-                                margin-top: 20px;">
-                                <h4 style="color: #1a1a2e; margin-top: 0;">💡 Respuesta de Libri:</h4>
-                            """, unsafe_allow_html=True)
-
-                            st.write(response.text)
-
-                            st.markdown("</div>", unsafe_allow_html=True)
-
-                        except Exception as e:
-                            st.error(f"❌ Ocurrió un error: {e}")
-                            st.info("💡 Verifica que tu API Key sea válida y que tengas conexión a internet.")
+                    try:
+                        # Crear contexto con los libros de la biblioteca
+                        books_context = f"\n\nContexto: Tengo acceso a una biblioteca con {len(books)} libros. "
+                        books_context += "Algunos géneros disponibles: " + ", ".join(sorted(set([b['genre'] for b in islice(books, 10)])))
+                        prompt = user_query + books_context
+                        # La caché se indexa solo por la pregunta: el contexto cambia con cada edición
+                        # del catálogo y la misma pregunta debe reutilizar la respuesta tras reiniciar
+                        key_prompt = "chat:" + user_query
+
+                        model = get_gemini_model(st.session_state.gemini_api_key)
+
+                        if stream_mode:
+                            # Cualquier clic provoca un rerun, que corta la respuesta en curso
+                            st.button("⏹️ Detener respuesta", key="stop_chat_stream")
+
+                        # Mostrar resultados con estilo
+                        st.markdown("""
+                        <div style="
+                            background-color: #f8f9fa;
+                            border-left: 4px solid #667eea;
+                            padding: 20px;
+                            border-radius: 8px;
+                            margin-top: 20px;">
+                            <h4 style="color: #1a1a2e; margin-top: 0;">💡 Respuesta de Libri:</h4>
+                        """, unsafe_allow_html=True)
+
+                        if stream_mode:
+                            # Llamar a Gemini en modo streaming
+                            metrics = {}
+                            st.write_stream(_timed(stream_text(model, prompt, key_prompt), metrics))
+                            if "first_token" in metrics:
+                                st.caption(
+                                    f"⚡ Primer fragmento en {metrics['first_token'] * 1000:.0f} ms · "
+                                    f"respuesta completa en {metrics.get('total', 0):.1f} s"
+                                )
+                        else:
+                            # Llamar a Gemini y esperar la respuesta completa
+                            with st.spinner(" Conchita está pensando..."):
+                                response_text = generate_text(model, prompt, key_prompt=key_prompt)
+                            st.write(response_text)
+
+                        st.markdown("</div>", unsafe_allow_html=True)
+
+                    except Exception as e:
+                        st.error(f"❌ Ocurrió un error: {e}")
+                        st.info("💡 Verifica que tu API Key sea válida y que tengas conexión a internet.")
                 else:
                     st.warning("⚠️ Por favor, escribe una pregunta primero.")
 
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import save_books
+from utils import update_book, delete_book, save_user_book, cover_image
 
 
 def render(books, user_data):
@@ -13,13 +13,22 @@ def render(books, user_data):
 
     # Selector de libro
     book_options = {f"{book['id']} - {book['title']} ({book['author']})": book for book in books}
+
+    # La selección guardada puede tener una etiqueta que ya no existe: si el libro se
+    # editó se pasa a su etiqueta nueva (mismo id) y si se eliminó se vacía
+    saved_option = st.session_state.get("edit_book_select", "")
+    if saved_option and saved_option not in book_options:
+        book = books.get(saved_option.split(" - ", 1)[0])
+        st.session_state.edit_book_select = f"{book['id']} - {book['title']} ({book['author']})" if book else ""
+
     selected_option = st.selectbox(
         "📖 Selecciona un libro para editar:",
         options=[""] + list(book_options.keys()),
-        format_func=lambda x: "-- Selecciona un libro --" if x == "" else x
+        format_func=lambda x: "-- Selecciona un libro --" if x == "" else x,
+        key="edit_book_select"
     )
 
-    if selected_option and selected_option != "":
+    if selected_option:
         selected_book = book_options[selected_option]
         
         st.divider()
@@ -42,7 +51,7 @@ def render(books, user_data):
         with col_preview:
             st.write("**Portada actual:**")
             if selected_book.get('cover'):
-                st.image(selected_book['cover'], width=200)
+                st.image(str(cover_image(selected_book['cover'])), width=200)
             else:
                 st.info("Sin portada")
         
@@ -76,7 +85,7 @@ def render(books, user_data):
                 
                 with col2:
                     # Obtener géneros existentes con opción "Mantener actual"
-                    existing_genres = ["-- Mantener actual --"] + sorted(list(set([book["genre"] for book in books])))
+                    existing_genres = ["-- Mantener actual --"] + books.genres()
                     
                     edit_genre = st.selectbox(
                         "🏷️ Género", 
@@ -130,30 +139,32 @@ def render(books, user_data):
                 
                 if submitted:
                     # Actualizar el libro solo con los campos que fueron modificados
-                    for book in books:
-                        if book['id'] == selected_book['id']:
-                            # Solo actualizar si el campo no está vacío
-                            if edit_title.strip():
-                                book['title'] = edit_title.strip()
-                            if edit_author.strip():
-                                book['author'] = edit_author.strip()
-                            if edit_genre != "-- Mantener actual --":
-                                book['genre'] = edit_genre.strip()
-                            if edit_year > 0:
-                                book['year'] = edit_year
-                            if edit_pages > 0:
-                                book['pages'] = edit_pages
-                            if edit_description.strip():
-                                book['description'] = edit_description.strip()
-                            if edit_cover.strip():
-                                book['cover'] = edit_cover.strip()
-                            break
-                    
-                    # Guardar cambios
-                    save_books(books)
-                    st.success(f"✅ ¡Libro actualizado exitosamente!")
-                    st.balloons()
-                    st.rerun()
+                    changes = {}
+                    if edit_title.strip():
+                        changes['title'] = edit_title.strip()
+                    if edit_author.strip():
+                        changes['author'] = edit_author.strip()
+                    if edit_genre != "-- Mantener actual --":
+                        changes['genre'] = edit_genre.strip()
+                    if edit_year > 0:
+                        changes['year'] = edit_year
+                    if edit_pages > 0:
+                        changes['pages'] = edit_pages
+                    if edit_description.strip():
+                        changes['description'] = edit_description.strip()
+                    if edit_cover.strip():
+                        changes['cover'] = edit_cover.strip()
+                    # Guardar cambios (publica una versión nueva del catálogo)
+                    try:
+                        update_book(selected_book['id'], **changes)
+                    except KeyError:
+                        # Otra sesión eliminó el libro mientras se editaba
+                        st.error("⚠️ Este libro ya no existe: otra sesión lo eliminó.")
+                    else:
+                        # Las estadísticas y tablas de cada sesión se actualizan al cargar la versión nueva
+                        st.success(f"✅ ¡Libro actualizado exitosamente!")
+                        st.balloons()
+                        st.rerun()
                 
                 if delete_confirm:
                     # Crear confirmación de eliminación en session_state
@@ -168,20 +179,15 @@ def render(books, user_data):
             
             with col_confirm:
                 if st.button("✅ Sí, eliminar", type="primary", use_container_width=True):
-                    # Eliminar el libro
-                    books[:] = [b for b in books if b['id'] != selected_book['id']]
-                    
                     # Eliminar de datos de usuario si estaba leído
                     if selected_book['id'] in user_data.get('read_books', []):
                         user_data['read_books'].remove(selected_book['id'])
                     if str(selected_book['id']) in user_data.get('ratings', {}):
                         del user_data['ratings'][str(selected_book['id'])]
+                    save_user_book(user_data, selected_book['id'])
                     
-                    from utils import save_user_data
-                    save_user_data(user_data)
-                    
-                    # Guardar cambios
-                    save_books(books)
+                    # Eliminar el libro del catálogo
+                    delete_book(selected_book['id'])
                     
                     # Limpiar session_state
                     del st.session_state.book_to_delete
@@ -1,10 +1,18 @@
 import streamlit as st
 import re
-import google.generativeai as genai
-from gtts import gTTS
-import os
-import tempfile
-from utils import display_book_card, get_recommendations, save_books
+from audio import PENDING as AUDIO_PENDING, DONE as AUDIO_DONE
+from pagination import IdSource
+from utils import display_book_card, display_book_grid, display_pagination, get_page, get_recommendation_ids, add_book, generate_text, get_gemini_model, cover_image, get_audio_queue
+
+
+# Mientras el audio se genera, solo este fragmento se vuelve a ejecutar (cada segundo)
+@st.fragment(run_every=1)
+def _wait_for_audio(audio_key):
+    if get_audio_queue().status(audio_key) == AUDIO_PENDING:
+        st.info("🔊 Generando audio del resumen...")
+    else:
+        # Terminó: rerun completo para mostrar el reproductor
+        st.rerun()
 
 
 def render(books, user_data):
@@ -19,7 +27,7 @@ def render(books, user_data):
         if st.button("✨ Obtener Recomendaciones IA", type="primary", use_container_width=True):
             with st.spinner("🔍 Analizando tu perfil de lectura..."):
                 # Obtener libros leídos y sus calificaciones
-                read_books_list = [b for b in books if b["id"] in user_data.get("read_books", [])]
+                read_books_list = [books.get(book_id) for book_id in user_data.get("read_books", []) if book_id in books]
                 ratings = user_data.get("ratings", {})
 
                 # Crear contexto para la IA
@@ -29,9 +37,10 @@ def render(books, user_data):
                     books_context.append(f"- '{book['title']}' de {book['author']} ({book['genre']}, {book['year']}) - Calificación: {rating}/5 estrellas")
 
                 # Obtener lista de libros disponibles en la biblioteca (no leídos)
+                read_ids = set(user_data.get("read_books", []))
                 available_books = []
                 for book in books:
-                    if book["id"] not in user_data.get("read_books", []):
+                    if book["id"] not in read_ids:
                         available_books.append(f"- ID {book['id']}: '{book['title']}' de {book['author']} ({book['genre']}, {book['year']}) - {book['description'][:100]}...")
 
                 # Crear prompt para la IA
@@ -61,9 +70,8 @@ BIBLIOTECA: ID 25: Cien años de soledad - Basándose en tu alta calificación a
 NUEVO: El amor en los tiempos del cólera por Gabriel García Márquez - Continuarás disfrutando del realismo mágico que tanto te gustó."""
 
                 try:
-                    model = genai.GenerativeModel("gemini-2.0-flash")
-                    response = model.generate_content(prompt)
-                    ai_response = response.text.strip()
+                    model = get_gemini_model(st.session_state.get('gemini_api_key', ''))
+                    ai_response = generate_text(model, prompt).strip()
 
                     biblioteca_match = re.search(r"BIBLIOTECA:\s*ID\s*(\d+):\s*([^-]+)-\s*(.*?)(?=NUEVO:|$)", ai_response, re.IGNORECASE | re.DOTALL)
                     nuevo_match = re.search(r"NUEVO:\s*([^-]+?)\s*(?:por|de)\s*([^-]+)-\s*(.*)", ai_response, re.IGNORECASE | re.DOTALL)
@@ -93,7 +101,7 @@ NUEVO: El amor en los tiempos del cólera por Gabriel García Márquez - Continu
             with col_rec1:
                 st.markdown("### 📚 De tu Biblioteca")
                 if rec["biblioteca_id"]:
-                    recommended_book = next((b for b in books if b["id"] == rec["biblioteca_id"]), None)
+                    recommended_book = books.get(rec["biblioteca_id"])
                     if recommended_book:
                         st.markdown(f"**{recommended_book['title']}**")
                         st.markdown(f"*{rec['biblioteca_explanation']}*")
@@ -115,9 +123,7 @@ NUEVO: El amor en los tiempos del cólera por Gabriel García Márquez - Continu
 
                     # Botón para agregar el libro
                     if st.button("➕ Agregar a mi biblioteca", key="add_ai_book_btn", type="primary", use_container_width=True):
-                        new_id = max([b["id"] for b in books]) + 1
                         new_book = {
-                            "id": new_id,
                             "title": rec["new_title"],
                             "author": rec["new_author"],
                             "genre": "Ficción",
@@ -126,8 +132,7 @@ NUEVO: El amor en los tiempos del cólera por Gabriel García Márquez - Continu
                             "pages": 300,
                             "cover": "https://via.placeholder.com/150x200?text=Sin+Portada"
                         }
-                        books.append(new_book)
-                        save_books(books)
+                        add_book(new_book)
                         del st.session_state.ai_recommendation
                         st.success(f"✅ ¡'{rec['new_title']}' ha sido agregado a tu biblioteca!")
                         st.balloons()
@@ -168,9 +173,6 @@ NUEVO: El amor en los tiempos del cólera por Gabriel García Márquez - Continu
         if search_button and search_query:
             with st.spinner("🔍 Buscando información del libro..."):
                 try:
-                    # Configurar la API key
-                    genai.configure(api_key=st.session_state.gemini_api_key)
-                    
                     # Crear prompt para buscar información del libro
                     search_prompt = f"""Busca información sobre el libro "{search_query}" y devuelve la información en el siguiente formato ESTRICTO:
 
@@ -187,9 +189,8 @@ IMPORTANTE:
 - Asegúrate de que sea un libro real y conocido
 - La descripción debe ser informativa pero concisa"""
 
-                    model = genai.GenerativeModel("gemini-2.0-flash")
-                    response = model.generate_content(search_prompt)
-                    ai_response = response.text.strip()
+                    model = get_gemini_model(st.session_state.gemini_api_key)
+                    ai_response = generate_text(model, search_prompt).strip()
                     
                     # Extraer información usando regex
                     titulo_match = re.search(r"TÍTULO:\s*(.+)", ai_response, re.IGNORECASE)
@@ -233,7 +234,7 @@ IMPORTANTE:
         
         with col_preview:
             if found["portada"]:
-                st.image(found["portada"], width=150)
+                st.image(str(cover_image(found["portada"])), width=150)
         
         with col_info:
             st.markdown(f"**Título:** {found['titulo']}")
@@ -253,9 +254,8 @@ IMPORTANTE:
                     else:
                         with st.spinner("🤖 Generando resumen inteligente del libro..."):
                             try:
-                                # Configurar Gemini
-                                genai.configure(api_key=st.session_state.gemini_api_key)
-                                model = genai.GenerativeModel("gemini-2.0-flash")
+                                # Modelo de Gemini compartido
+                                model = get_gemini_model(st.session_state.gemini_api_key)
                                 
                                 # Generar resumen con IA
                                 summary_prompt = f"""Genera un resumen profesional y atractivo del libro "{found['titulo']}" de {found['autor']}.
@@ -275,7 +275,8 @@ Descripción base: {found['descripcion']}
 IMPORTANTE: Responde SOLO con el resumen, sin títulos ni encabezados."""
 
                                 # Generar contenido con timeout implícito
-                                response = model.generate_content(
+                                response_text = generate_text(
+                                    model,
                                     summary_prompt,
                                     generation_config={
                                         'temperature': 0.7,
@@ -283,28 +284,16 @@ IMPORTANTE: Responde SOLO con el resumen, sin títulos ni encabezados."""
                                     }
                                 )
                                 
-                                if response and response.text:
-                                    resumen = response.text.strip()
+                                if response_text:
+                                    resumen = response_text.strip()
                                     
                                     # Guardar resumen en session_state
                                     st.session_state.audio_summary = resumen
                                     st.success("✅ Resumen generado!")
                                     
-                                    # Generar audio inmediatamente después del resumen
-                                    try:
-                                        with st.spinner("🔊 Convirtiendo a audio..."):
-                                            temp_dir = tempfile.gettempdir()
-                                            audio_file = os.path.join(temp_dir, f"book_summary_{hash(found['titulo'])}.mp3")
-                                            
-                                            tts = gTTS(text=resumen, lang='es', slow=False)
-                                            tts.save(audio_file)
-                                            
-                                            st.session_state.audio_file_path = audio_file
-                                            st.session_state.audio_generated = True
-                                            st.rerun()
-                                    except Exception as audio_error:
-                                        st.warning(f"⚠️ Resumen generado pero error en audio: {str(audio_error)}")
-                                        st.rerun()
+                                    # Encolar el audio; se sintetiza en segundo plano
+                                    st.session_state.audio_key = get_audio_queue().submit(resumen)
+                                    st.rerun()
                                 else:
                                     st.error("❌ No se pudo generar el resumen. Intenta de nuevo.")
                                 
@@ -318,53 +307,41 @@ IMPORTANTE: Responde SOLO con el resumen, sin títulos ni encabezados."""
                 st.markdown("#### 📝 Resumen Generado")
                 st.write(st.session_state.audio_summary)
                 
-                # Mostrar el audio si ya fue generado
-                if st.session_state.get("audio_generated") and st.session_state.get("audio_file_path"):
-                    audio_file = st.session_state.audio_file_path
+                # Mostrar el audio cuando el trabajo en segundo plano termine
+                audio_queue = get_audio_queue()
+                audio_key = st.session_state.get("audio_key")
+                if audio_key is None:
+                    audio_key = st.session_state.audio_key = audio_queue.submit(st.session_state.audio_summary)
+                status = audio_queue.status(audio_key)
+                
+                if status == AUDIO_PENDING:
+                    _wait_for_audio(audio_key)
+                elif status == AUDIO_DONE:
+                    audio_file = audio_queue.path(audio_key)
+                    # Mostrar reproductor de audio
+                    st.audio(str(audio_file), format='audio/mp3')
+                    st.success("✅ Audio generado exitosamente!")
                     
-                    if os.path.exists(audio_file):
-                        # Mostrar reproductor de audio
-                        st.audio(audio_file, format='audio/mp3')
-                        st.success("✅ Audio generado exitosamente!")
-                        
-                        # Botón para descargar
-                        with open(audio_file, 'rb') as f:
-                            audio_bytes = f.read()
-                            st.download_button(
-                                label="⬇️ Descargar Audio",
-                                data=audio_bytes,
-                                file_name=f"{found['titulo']}_resumen.mp3",
-                                mime="audio/mp3",
-                                use_container_width=True
-                            )
-                    else:
-                        st.warning("⚠️ El archivo de audio no está disponible")
+                    # Botón para descargar
+                    st.download_button(
+                        label="⬇️ Descargar Audio",
+                        data=audio_file.read_bytes(),
+                        file_name=f"{found['titulo']}_resumen.mp3",
+                        mime="audio/mp3",
+                        use_container_width=True
+                    )
                 else:
-                    # Si no hay audio generado aún, intentar generarlo ahora
-                    st.info("🔊 Generando audio del resumen...")
-                    try:
-                        temp_dir = tempfile.gettempdir()
-                        audio_file = os.path.join(temp_dir, f"book_summary_{hash(found['titulo'])}.mp3")
-                        
-                        tts = gTTS(text=st.session_state.audio_summary, lang='es', slow=False)
-                        tts.save(audio_file)
-                        
-                        st.session_state.audio_file_path = audio_file
-                        st.session_state.audio_generated = True
+                    st.error(f"❌ Error al generar audio: {audio_queue.error(audio_key)}")
+                    if st.button("🔄 Reintentar Generar Audio", use_container_width=True):
+                        audio_queue.submit(st.session_state.audio_summary)
                         st.rerun()
-                    except Exception as e:
-                        st.error(f"❌ Error al generar audio: {str(e)}")
-                        if st.button("🔄 Reintentar Generar Audio", use_container_width=True):
-                            st.rerun()
             
             st.divider()
             col_add, col_cancel = st.columns([3, 1])
             
             with col_add:
                 if st.button("✅ Agregar a Mi Biblioteca", type="primary", use_container_width=True, key="add_found_book"):
-                    new_id = max([b["id"] for b in books]) + 1
                     new_book = {
-                        "id": new_id,
                         "title": found["titulo"],
                         "author": found["autor"],
                         "genre": found["genero"],
@@ -373,15 +350,12 @@ IMPORTANTE: Responde SOLO con el resumen, sin títulos ni encabezados."""
                         "pages": found["paginas"],
                         "cover": found["portada"]
                     }
-                    books.append(new_book)
-                    save_books(books)
+                    add_book(new_book)
                     # Limpiar estados
                     if "audio_summary" in st.session_state:
                         del st.session_state.audio_summary
-                    if "audio_generated" in st.session_state:
-                        del st.session_state.audio_generated
-                    if "audio_file_path" in st.session_state:
-                        del st.session_state.audio_file_path
+                    if "audio_key" in st.session_state:
+                        del st.session_state.audio_key
                     del st.session_state.found_book
                     st.success(f"✅ ¡'{found['titulo']}' ha sido agregado a tu biblioteca!")
                     st.balloons()
@@ -392,17 +366,24 @@ IMPORTANTE: Responde SOLO con el resumen, sin títulos ni encabezados."""
                     # Limpiar todos los estados relacionados
                     if "audio_summary" in st.session_state:
                         del st.session_state.audio_summary
-                    if "audio_generated" in st.session_state:
-                        del st.session_state.audio_generated
-                    if "audio_file_path" in st.session_state:
-                        del st.session_state.audio_file_path
+                    if "audio_key" in st.session_state:
+                        del st.session_state.audio_key
                     del st.session_state.found_book
                     st.rerun()
     
     st.divider()
 
+    # ── Libros similares a los favoritos ──
+    favorite_ids = [int(book_id) for book_id, rating in user_data.get("ratings", {}).items() if rating >= 4]
+    if favorite_ids:
+        st.subheader("🔗 Similares a tus Favoritos")
+        st.write("Libros parecidos por descripción, género y autor a los que mejor calificaste.")
+        similar_books = books.similar_to_profile(favorite_ids, limit=3, exclude=user_data.get("read_books", []))
+        display_book_grid(similar_books, user_data, key_prefix="sim_")
+        st.divider()
+
     st.subheader("📚 Recomendaciones Basadas en tu Perfil")
-    recommendations = get_recommendations(books, user_data, limit=50)
+    recommendations = IdSource(get_recommendation_ids(books, user_data, limit=50, compat=False), books.get)
 
     if user_data.get("read_books"):
         st.write("Basadas en tus lecturas y calificaciones:")
@@ -411,58 +392,12 @@ IMPORTANTE: Responde SOLO con el resumen, sin títulos ni encabezados."""
         st.write("Mientras tanto, aquí tienes algunos libros populares:")
 
     # Paginación para recomendaciones
-    rec_per_page = 9
-    total_recs = len(recommendations)
-    total_rec_pages = (total_recs + rec_per_page - 1) // rec_per_page
-
-    # Inicializar página de recomendaciones en session state
-    if 'rec_current_page' not in st.session_state:
-        st.session_state.rec_current_page = 1
+    page = get_page(recommendations, "rec_current_page", page_size=9)
 
-    # Asegurar que la página actual esté en rango válido
-    if st.session_state.rec_current_page > total_rec_pages and total_rec_pages > 0:
-        st.session_state.rec_current_page = total_rec_pages
-    elif st.session_state.rec_current_page < 1:
-        st.session_state.rec_current_page = 1
-
-    st.write(f"Mostrando {total_recs} recomendación(es) - Página {st.session_state.rec_current_page} de {max(total_rec_pages, 1)}")
-
-    # Calcular índices para la página actual
-    rec_start_idx = (st.session_state.rec_current_page - 1) * rec_per_page
-    rec_end_idx = min(rec_start_idx + rec_per_page, total_recs)
-    current_page_recs = recommendations[rec_start_idx:rec_end_idx]
+    st.write(f"Mostrando {page.total} recomendación(es) - Página {page.number} de {max(page.total_pages, 1)}")
 
     # Mostrar recomendaciones en grid de 3 columnas
-    for i in range(0, len(current_page_recs), 3):
-        cols = st.columns(3)
-        for j, col in enumerate(cols):
-            if i + j < len(current_page_recs):
-                display_book_card(current_page_recs[i + j], user_data, col, key_prefix="rec_")
+    display_book_grid(page.items, user_data, key_prefix="rec_", books=books)
 
     # Controles de paginación para recomendaciones
-    if total_rec_pages > 1:
-        st.divider()
-        col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
-
-        with col1:
-            if st.button("⏮️ Primera", disabled=(st.session_state.rec_current_page == 1), key="rec_first_page"):
-                st.session_state.rec_current_page = 1
-                st.rerun()
-
-        with col2:
-            if st.button("◀️ Anterior", disabled=(st.session_state.rec_current_page == 1), key="rec_prev_page"):
-                st.session_state.rec_current_page -= 1
-                st.rerun()
-
-        with col3:
-            st.markdown(f"<div style='text-align: center; padding: 8px;'>Página {st.session_state.rec_current_page} de {total_rec_pages}</div>", unsafe_allow_html=True)
-
-        with col4:
-            if st.button("Siguiente ▶️", disabled=(st.session_state.rec_current_page == total_rec_pages), key="rec_next_page"):
-                st.session_state.rec_current_page += 1
-                st.rerun()
-
-        with col5:
-            if st.button("Última ⏭️", disabled=(st.session_state.rec_current_page == total_rec_pages), key="rec_last_page"):
-                st.session_state.rec_current_page = total_rec_pages
-                st.rerun()
+    display_pagination(page, "rec_current_page", key_prefix="rec_")
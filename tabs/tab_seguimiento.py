@@ -1,7 +1,6 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
-from utils import save_user_data
+from utils import save_user_book, get_reading_stats, get_reading_tables, get_reading_analytics, record_progress
 
 
 def render(books, user_data):
@@ -19,11 +18,12 @@ def render(books, user_data):
     st.subheader("📖 Actualmente Leyendo")
     
     currently_reading = user_data.get('currently_reading', {})
+    analytics = get_reading_analytics(books)
     
     if currently_reading:
         for book_id_str, progress_data in list(currently_reading.items()):
             book_id = int(book_id_str)
-            book = next((b for b in books if b["id"] == book_id), None)
+            book = books.get(book_id)
             
             if book:
                 with st.container():
@@ -46,6 +46,10 @@ def render(books, user_data):
                         st.progress(progress_pct / 100)
                         st.caption(f"📊 Progreso: {progress_pct:.1f}%")
                         
+                        projected = analytics.projected_finish(total_pages - pages_read)
+                        if projected and pages_read < total_pages:
+                            st.caption(f"🏁 Fin estimado a tu ritmo: {projected.strftime('%Y-%m-%d')}")
+                        
                         # Actualizar páginas leídas
                         new_pages = st.number_input(
                             "Actualizar páginas leídas:",
@@ -57,7 +61,8 @@ def render(books, user_data):
                         
                         if new_pages != pages_read:
                             currently_reading[book_id_str]['pages_read'] = new_pages
-                            save_user_data(user_data)
+                            record_progress(books, book_id, new_pages - pages_read, new_pages)
+                            save_user_book(user_data, book_id)
                             st.rerun()
                     
                     with col_actions:
@@ -74,23 +79,29 @@ def render(books, user_data):
                                 'finish_date': datetime.now().strftime('%Y-%m-%d'),
                                 'pages': total_pages
                             }
+                            if pages_read < total_pages:
+                                record_progress(books, book_id, total_pages - pages_read, total_pages)
+                            reading_tables = get_reading_tables(books, user_data)
+                            reading_tables.finish(book, user_data['finished_books'][book_id_str])
                             
                             # Agregar a libros leídos si no está
                             if book_id not in user_data.get('read_books', []):
                                 if 'read_books' not in user_data:
                                     user_data['read_books'] = []
                                 user_data['read_books'].append(book_id)
+                                get_reading_stats(books, user_data).mark_read(book)
+                                reading_tables.mark_read(book, user_data.get('ratings', {}).get(book_id_str, 0))
                             
                             # Eliminar de actualmente leyendo
                             del currently_reading[book_id_str]
-                            save_user_data(user_data)
+                            save_user_book(user_data, book_id)
                             st.success(f"¡Felicidades! Has terminado '{book['title']}'")
                             st.balloons()
                             st.rerun()
                         
                         if st.button("❌ Abandonar", key=f"abandon_{book_id}", use_container_width=True):
                             del currently_reading[book_id_str]
-                            save_user_data(user_data)
+                            save_user_book(user_data, book_id)
                             st.rerun()
                     
                     st.divider()
@@ -101,22 +112,29 @@ def render(books, user_data):
     st.subheader("➕ Comenzar a Leer")
     
     # Filtrar libros no leídos y que no estés leyendo actualmente
+    read_ids = set(user_data.get("read_books", []))
     available_books = [
         b for b in books 
-        if b["id"] not in user_data.get("read_books", []) 
+        if b["id"] not in read_ids 
         and str(b["id"]) not in currently_reading
     ]
     
     if available_books:
         book_options = {f"{book['title']} - {book['author']}": book for book in available_books}
-        
+
+        # La selección guardada puede ser un libro que ya se empezó a leer (o que se editó
+        # o eliminó): entonces se vacía para no pasarle al selector una opción inexistente
+        if st.session_state.get("start_book_select", "") not in book_options:
+            st.session_state.start_book_select = ""
+
         selected_book_name = st.selectbox(
             "Selecciona un libro para comenzar:",
             options=[""] + list(book_options.keys()),
-            format_func=lambda x: "-- Selecciona un libro --" if x == "" else x
+            format_func=lambda x: "-- Selecciona un libro --" if x == "" else x,
+            key="start_book_select"
         )
         
-        if selected_book_name and selected_book_name != "":
+        if selected_book_name:
             selected_book = book_options[selected_book_name]
             
             col1, col2 = st.columns([3, 1])
@@ -132,7 +150,7 @@ def render(books, user_data):
                         'start_date': datetime.now().strftime('%Y-%m-%d'),
                         'status': 'reading'
                     }
-                    save_user_data(user_data)
+                    save_user_book(user_data, selected_book['id'])
                     st.success(f"¡Has comenzado a leer '{selected_book['title']}'!")
                     st.rerun()
     else:
@@ -160,50 +178,52 @@ def render(books, user_data):
         )
         st.metric("📄 Páginas Leídas (en progreso)", total_pages_reading)
     
+    # Ritmo de lectura (acumulados precalculados del registro de progreso)
+    if analytics.daily:
+        st.subheader("🔥 Ritmo de Lectura")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("🔥 Racha actual", f"{analytics.active_streak()} días")
+        with col2:
+            st.metric("🏅 Racha más larga", f"{analytics.longest_streak} días")
+        with col3:
+            st.metric("📅 Páginas esta semana", analytics.pages_this_week())
+        with col4:
+            st.metric("🗓️ Páginas este mes", analytics.pages_this_month())
+        
+        st.bar_chart(analytics.daily_series(30))
+        
+        genre_pace = analytics.genre_pace()
+        if not genre_pace.empty:
+            st.write("**Ritmo por género:**")
+            st.dataframe(genre_pace, use_container_width=True, hide_index=True)
+    
     # Historial de libros terminados
     if finished_books:
         st.subheader("🏆 Historial de Libros Terminados")
         
-        history_data = []
-        for book_id_str, finish_data in finished_books.items():
-            book = next((b for b in books if b["id"] == int(book_id_str)), None)
-            if book:
-                start = finish_data.get('start_date', 'N/A')
-                finish = finish_data.get('finish_date', 'N/A')
-                
-                # Calcular días de lectura
-                days = "N/A"
-                if start != 'N/A' and finish != 'N/A':
-                    try:
-                        start_dt = datetime.strptime(start, '%Y-%m-%d')
-                        finish_dt = datetime.strptime(finish, '%Y-%m-%d')
-                        days = (finish_dt - start_dt).days + 1
-                    except:
-                        pass
-                
-                history_data.append({
-                    "Título": book['title'],
-                    "Autor": book['author'],
-                    "Páginas": book['pages'],
-                    "Inicio": start,
-                    "Fin": finish,
-                    "Días": days
-                })
-        
-        df = pd.DataFrame(history_data)
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        # Tabla en columnas del historial (fechas ya convertidas una sola vez)
+        reading_tables = get_reading_tables(books, user_data)
+        history = reading_tables.finished
+        st.dataframe(
+            history,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Inicio": st.column_config.DateColumn("Inicio", format="YYYY-MM-DD"),
+                "Fin": st.column_config.DateColumn("Fin", format="YYYY-MM-DD"),
+            }
+        )
         
         # Estadísticas adicionales
-        if len(history_data) > 0:
+        if len(history) > 0:
             st.subheader("📊 Análisis de Velocidad de Lectura")
             
-            valid_days = [h['Días'] for h in history_data if isinstance(h['Días'], int)]
-            valid_pages = [h['Páginas'] for h in history_data if isinstance(h['Días'], int)]
+            speed = reading_tables.reading_speed()
             
-            if valid_days:
-                avg_days = sum(valid_days) / len(valid_days)
-                total_pages_finished = sum(valid_pages)
-                avg_pages_per_day = total_pages_finished / sum(valid_days) if sum(valid_days) > 0 else 0
+            if speed:
+                avg_days, total_pages_finished, avg_pages_per_day = speed
                 
                 col1, col2, col3 = st.columns(3)
                 
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from audio import DONE, ERROR, PENDING, AudioJobQueue, audio_key, split_text
+
+
+class StubEngine:
+    """Motor de prueba: devuelve el texto entre corchetes como "MP3" y cuenta las llamadas."""
+
+    def __init__(self, fail_times=0, gate=None):
+        self.calls = []
+        self.fail_times = fail_times
+        self.gate = gate  # threading.Event que retiene la síntesis hasta activarse
+        self._lock = threading.Lock()
+
+    def synthesize(self, text, lang):
+        if self.gate is not None:
+            self.gate.wait(5)
+        with self._lock:
+            self.calls.append((text, lang))
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RuntimeError("motor caído")
+        return f"[{text}]".encode("utf-8")
+
+
+def wait(queue, key, timeout=5):
+    deadline = time.monotonic() + timeout
+    while queue.status(key) == PENDING:
+        if time.monotonic() > deadline:
+            pytest.fail("El trabajo de audio no terminó a tiempo")
+        time.sleep(0.01)
+    return queue.status(key)
+
+
+@pytest.fixture
+def long_text():
+    return " ".join(f"Esta es la frase número {i} del resumen." for i in range(40))
+
+
+def test_submit_synthesizes_and_caches(tmp_path):
+    engine = StubEngine()
+    queue = AudioJobQueue(tmp_path, engine)
+
+    key = queue.submit("Hola mundo.")
+    assert key == audio_key("Hola mundo.", "es")
+    assert wait(queue, key) == DONE
+    assert queue.path(key).read_bytes() == b"[Hola mundo.]"
+
+    # Mismo texto: sale de la caché en disco sin volver a llamar al motor
+    assert queue.submit("Hola mundo.") == key
+    assert queue.status(key) == DONE
+    assert len(engine.calls) == 1
+
+    # También desde otra cola (otro proceso) sobre el mismo directorio
+    other_engine = StubEngine()
+    other = AudioJobQueue(tmp_path, other_engine)
+    assert other.status(other.submit("Hola mundo.")) == DONE
+    assert other_engine.calls == []
+
+
+def test_long_text_is_chunked_and_concatenated_in_order(tmp_path, long_text):
+    engine = StubEngine()
+    queue = AudioJobQueue(tmp_path, engine, chunk_workers=4)
+
+    chunks = split_text(long_text)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 400 for chunk in chunks)
+
+    key = queue.submit(long_text)
+    assert wait(queue, key) == DONE
+    assert sorted(text for text, _ in engine.calls) == sorted(chunks)
+    assert queue.path(key).read_bytes() == b"".join(f"[{chunk}]".encode("utf-8") for chunk in chunks)
+
+
+def test_status_goes_from_pending_to_done(tmp_path):
+    gate = threading.Event()
+    queue = AudioJobQueue(tmp_path, StubEngine(gate=gate))
+
+    key = queue.submit("Un resumen corto.")
+    assert queue.status(key) == PENDING
+    assert not queue.path(key).exists()
+    assert queue.error(key) is None
+
+    gate.set()
+    assert wait(queue, key) == DONE
+    assert queue.error(key) is None
+
+
+def test_failed_job_reports_error_and_can_be_retried(tmp_path):
+    engine = StubEngine(fail_times=1)
+    queue = AudioJobQueue(tmp_path, engine)
+
+    key = queue.submit("Un resumen corto.")
+    assert wait(queue, key) == ERROR
+    assert queue.error(key) == "motor caído"
+    # Un MP3 a medias nunca queda en la caché
+    assert not queue.path(key).exists()
+    assert list(tmp_path.iterdir()) == []
+
+    # Volver a encolarlo reintenta el trabajo fallido
+    assert queue.submit("Un resumen corto.") == key
+    assert wait(queue, key) == DONE
+    assert queue.path(key).read_bytes() == b"[Un resumen corto.]"
+    assert len(engine.calls) == 2
+
+
+def test_unknown_job_is_an_error(tmp_path):
+    queue = AudioJobQueue(tmp_path, StubEngine())
+    assert queue.status("no-existe") == ERROR
+    assert queue.error("no-existe") == "El trabajo de audio no existe"
@@ -0,0 +1,123 @@
+import json
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+from persistence import DebouncedWriter
+from storage import JsonStorage
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class RecordingStorage:
+    """Almacenamiento de prueba que guarda cada escritura recibida."""
+
+    def __init__(self):
+        self.saved = []
+
+    def save_user_books(self, user_data, book_ids):
+        self.saved.append((user_data, book_ids))
+
+
+def user_data(read_books=()):
+    return {"read_books": list(read_books), "ratings": {}, "currently_reading": {}, "finished_books": {}}
+
+
+def test_burst_of_changes_is_written_once():
+    storage = RecordingStorage()
+    writer = DebouncedWriter(storage, delay=0.05)
+    data = user_data()
+    for rating in range(1, 21):
+        data["ratings"]["7"] = rating % 5 + 1
+        writer.save_user_book(data, 7)
+    data["read_books"].append(8)
+    writer.save_user_book(data, 8)
+
+    time.sleep(0.3)
+    assert writer.writes == 1
+    assert len(storage.saved) == 1
+    saved, book_ids = storage.saved[0]
+    assert book_ids == [7, 8]
+    assert saved == data
+
+
+def test_pending_write_is_a_snapshot():
+    storage = RecordingStorage()
+    writer = DebouncedWriter(storage, delay=60)
+    data = user_data([1])
+    writer.save_user_book(data, 1)
+    # La sesión sigue modificando su user_data después de programar el guardado
+    data["read_books"].append(2)
+
+    writer.flush()
+    assert storage.saved[0][0]["read_books"] == [1]
+
+
+def test_flush_drains_pending_writes():
+    storage = RecordingStorage()
+    writer = DebouncedWriter(storage, delay=60)
+    writer.save_user_book(user_data([1]), 1)
+    writer.save_user_book(user_data([2]), 2)  # otra sesión: otro user_data
+    assert writer.writes == 0
+
+    writer.flush()
+    assert writer.writes == 2
+    assert sorted(book_ids for _, book_ids in storage.saved) == [[1], [2]]
+    assert writer._timer is None
+
+    # Sin nada pendiente, flush no escribe
+    writer.flush()
+    assert writer.writes == 2
+
+
+def test_pending_writes_are_flushed_at_exit(tmp_path):
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {str(ROOT)!r})
+        from persistence import DebouncedWriter
+        from storage import JsonStorage
+
+        storage = JsonStorage({str(tmp_path / "books.json")!r}, {str(tmp_path / "user_data.json")!r})
+        writer = DebouncedWriter(storage, delay=60)
+        writer.save_user_book({{"read_books": [42], "ratings": {{"42": 5}}}}, 42)
+        # El proceso termina sin llamar a flush: lo hace el atexit
+    """)
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=60)
+
+    saved = json.loads((tmp_path / "user_data.json").read_text(encoding="utf-8"))
+    assert saved == {"read_books": [42], "ratings": {"42": 5}}
+
+
+def test_concurrent_reader_never_sees_partial_user_data(tmp_path):
+    storage = JsonStorage(tmp_path / "books.json", tmp_path / "user_data.json")
+    # Estados grandes para que cada escritura tarde y se solape con las lecturas
+    states = [user_data(range(n, n + 20_000)) for n in range(5)]
+    storage.save_user_data(states[0])
+    expected = {json.dumps(state, sort_keys=True) for state in states}
+
+    stop = threading.Event()
+    problems = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                data = storage.load_user_data()
+            except (json.JSONDecodeError, OSError) as e:
+                problems.append(repr(e))
+                continue
+            if json.dumps(data, sort_keys=True) not in expected:
+                problems.append("estado desconocido")
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(20):
+            storage.save_user_data(states[i % len(states)])
+    finally:
+        stop.set()
+        reader.join()
+
+    assert problems == []
@@ -1,11 +1,171 @@
 import streamlit as st
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+import io
 import json
+import os
+import threading
 from pathlib import Path
 
+from ai_cache import ResponseCache, generate_cached, stream_cached
+from analytics import ReadingAnalytics, progress_event
+from audio import AudioJobQueue
+from bulk_import import detect_format, import_records, read_records
+from cards import card_html
+from catalog import Catalog
+from catalog_store import CatalogStore
+from covers import LARGE, CoverCache
+from pagination import Paginator
+from persistence import DebouncedWriter
+from profiles import DEFAULT_PROFILE, ProfileStore, profile_id
+from stats import ReadingStats
+from storage import JournalStorage, SqliteStorage, import_json
+from tables import ReadingTables
+
 # Rutas a archivos de datos
-BOOKS_FILE = Path("data/books.json")
+# El catálogo puede estar en JSON o en JSONL (un libro por línea)
+BOOKS_FILE = Path(os.environ.get("LIBROS_BOOKS_FILE", "data/books.json"))
 USER_DATA_FILE = Path("data/user_data.json")
 API_KEY_FILE = Path("data/api_key.json")
+DB_FILE = Path("data/libros.db")
+SIMILARITY_FILE = Path("data/similarity_index.npz")
+AI_CACHE_FILE = Path("data/ai_cache.db")
+COVERS_DIR = Path("data/covers")
+AUDIO_DIR = Path("data/audio")
+USERS_DIR = Path("data/users")
+
+# Modelo de Gemini usado por la app
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# genai.configure es global al proceso: se serializa la creación de modelos
+_gemini_lock = threading.Lock()
+
+# Claves de widgets cuyo valor se conserva aunque su pestaña no se dibuje, con su valor
+# inicial (los widgets no llevan value=/index=: se inicializan desde session_state)
+PERSISTENT_WIDGET_KEYS = {
+    "search_book_input": "",
+    "chat_query": "",
+    "chat_stream_mode": True,
+    "edit_book_select": "",
+    "start_book_select": "",
+}
+
+# Claves de session_state que dependen del perfil (se descartan al cambiar de perfil)
+PROFILE_STATE_KEYS = ("user_data", "reading_stats", "reading_tables", "reading_analytics")
+
+# Claves de session_state calculadas a partir del catálogo (se actualizan con los libros que
+# cambian en cada versión nueva, o se rehacen si no se sabe cuáles cambiaron)
+CATALOG_STATE_KEYS = ("reading_stats", "reading_tables", "reading_analytics")
+
+# Backend de almacenamiento: "sqlite" (por defecto) o "json" (archivos JSON con diario)
+STORAGE_BACKEND = os.environ.get("LIBROS_STORAGE", "sqlite")
+
+# Segundos en los que se agrupan los cambios de user_data antes de escribirlos
+SAVE_DELAY = float(os.environ.get("LIBROS_SAVE_DELAY", "1.0"))
+
+# Función para obtener el almacenamiento compartido por todas las sesiones
+@st.cache_resource
+def get_storage():
+    if STORAGE_BACKEND == "json":
+        return JournalStorage(BOOKS_FILE, USER_DATA_FILE)
+    storage = SqliteStorage(DB_FILE)
+    # Importación única desde los JSON existentes
+    if storage.is_empty() and BOOKS_FILE.exists():
+        import_json(storage, BOOKS_FILE, USER_DATA_FILE)
+    return storage
+
+# Función para obtener el escritor diferido de user_data (una escritura por ráfaga de cambios)
+@st.cache_resource
+def get_user_data_writer():
+    return DebouncedWriter(get_storage(), delay=SAVE_DELAY)
+
+# Función para obtener los almacenamientos de user_data por perfil (los perfiles
+# usados recientemente quedan abiertos, el resto se cierra por LRU)
+@st.cache_resource
+def get_profile_store():
+    return ProfileStore(_open_profile_storage, on_evict=lambda storage: get_user_data_writer().flush())
+
+# Función para abrir el almacenamiento de un perfil: cada perfil tiene su propio
+# archivo, así que las sesiones de perfiles distintos no se bloquean entre sí
+def _open_profile_storage(profile):
+    # El perfil por defecto conserva los datos de siempre
+    if profile == DEFAULT_PROFILE:
+        return get_storage()
+    if STORAGE_BACKEND == "json":
+        (USERS_DIR / profile).mkdir(parents=True, exist_ok=True)
+        return JournalStorage(BOOKS_FILE, USERS_DIR / profile / "user_data.json")
+    USERS_DIR.mkdir(parents=True, exist_ok=True)
+    return SqliteStorage(USERS_DIR / f"{profile}.db")
+
+# Función para obtener el perfil de la sesión (se indica en la URL con ?perfil=nombre)
+def get_profile():
+    return profile_id(st.query_params.get("perfil", DEFAULT_PROFILE))
+
+# Función para activar el perfil de la URL; si cambió, se descartan los datos del anterior
+def use_profile():
+    profile = get_profile()
+    if st.session_state.get('profile') != profile:
+        for key in PROFILE_STATE_KEYS:
+            st.session_state.pop(key, None)
+        st.session_state.profile = profile
+    return profile
+
+# Función para cambiar de perfil desde el sidebar (callback del campo de perfil)
+def switch_profile():
+    st.query_params["perfil"] = profile_id(st.session_state.profile_input)
+
+# Función para obtener el almacenamiento de user_data del perfil de la sesión
+def get_user_storage():
+    return get_profile_store().get(get_profile())
+
+# Función para conservar el estado de widgets que no se dibujan en este rerun
+# (Streamlit descarta el valor de los widgets que no aparecen en una ejecución)
+def keep_widget_state():
+    for key, default in PERSISTENT_WIDGET_KEYS.items():
+        st.session_state[key] = st.session_state.setdefault(key, default)
+
+# Función para obtener un modelo de Gemini reutilizable (uno por API Key y modelo)
+@st.cache_resource(show_spinner=False)
+def get_gemini_model(api_key, model_name=GEMINI_MODEL):
+    with _gemini_lock:
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(model_name)
+        # Fijar el cliente ahora para que el modelo conserve su clave y su conexión
+        # aunque otra sesión vuelva a llamar a genai.configure con otra clave
+        model._client = genai_client.get_default_generative_client()
+    return model
+
+# Función para obtener la caché de respuestas de Gemini (compartida por todas las sesiones)
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(AI_CACHE_FILE)
+
+# Función para obtener la caché local de portadas (miniaturas WebP)
+@st.cache_resource
+def get_cover_cache():
+    return CoverCache(COVERS_DIR)
+
+# Función para obtener la cola de audios (texto a voz en segundo plano, con caché en disco)
+@st.cache_resource
+def get_audio_queue():
+    return AudioJobQueue(AUDIO_DIR)
+
+# Función para encolar en segundo plano las portadas de una página que aún no están
+# descargadas (mientras tanto se muestra el marcador; no bloquea el dibujo)
+def prefetch_covers(books):
+    get_cover_cache().request(book.get("cover") for book in books)
+
+# Función para obtener la ruta local de una portada en tamaño grande
+def cover_image(url):
+    return get_cover_cache().path(url, LARGE)
+
+# Función para generar texto con Gemini reutilizando respuestas ya obtenidas
+def generate_text(model, prompt, generation_config=None, key_prompt=None):
+    return generate_cached(get_response_cache(), model, prompt, generation_config, key_prompt)
+
+# Función para recibir la respuesta de Gemini por fragmentos (streaming)
+def stream_text(model, prompt, key_prompt=None):
+    return stream_cached(get_response_cache(), model, prompt, key_prompt)
 
 # Función para cargar API Key
 def load_api_key():
@@ -26,181 +186,283 @@ def save_api_key(api_key):
     except:
         pass
 
-# Función para cargar libros
-@st.cache_data
-def load_books():
-    with open(BOOKS_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# Función para obtener el catálogo compartido por todas las sesiones (una sola copia
+# en memoria; las ediciones publican versiones nuevas en lugar de vaciar la caché)
+@st.cache_resource
+def get_catalog_store():
+    return CatalogStore(get_storage(), _build_catalog)
+
+# Función para construir una versión del catálogo indexado
+def _build_catalog(books):
+    catalog = Catalog(books, similarity_file=SIMILARITY_FILE)
+    # Construir el recomendador antes de publicar la versión; el índice de similitud
+    # (una matriz densa) se carga la primera vez que se piden libros parecidos
+    catalog.scorer()
+    return catalog
+
+# Función para cargar el catálogo indexado (la versión publicada; no se modifica)
+def load_catalog():
+    store = get_catalog_store()
+    version, catalog = store.snapshot()
+    # Si el catálogo cambió (en esta u otra sesión), se aplican sus cambios a los datos calculados
+    last_version = st.session_state.get('catalog_version', version)
+    if last_version != version:
+        changed = store.changed_between(last_version, version)
+        if changed is None:
+            for key in CATALOG_STATE_KEYS:
+                st.session_state.pop(key, None)
+        else:
+            apply_catalog_changes(catalog, changed)
+    st.session_state.catalog_version = version
+    return catalog
+
+# Función para reflejar en las estadísticas, tablas y análisis de la sesión los libros
+# añadidos, editados o eliminados en una versión nueva del catálogo
+def apply_catalog_changes(catalog, changed_ids):
+    user_data = st.session_state.get('user_data', {})
+    stats = st.session_state.get('reading_stats')
+    tables = st.session_state.get('reading_tables')
+    for book_id in changed_ids:
+        book = catalog.get(book_id)
+        if book is None:
+            if stats is not None:
+                stats.remove_book(book_id)
+            if tables is not None:
+                tables.remove_book(book_id)
+        else:
+            if stats is not None:
+                stats.update_book(book)
+            if tables is not None:
+                tables.update_book(book, user_data)
+    analytics = st.session_state.get('reading_analytics')
+    if analytics is not None and not analytics.update_books(catalog, changed_ids):
+        del st.session_state['reading_analytics']
 
 # Función para cargar datos del usuario
 def load_user_data():
-    if not USER_DATA_FILE.exists():
-        return {"read_books": [], "ratings": {}}
-    with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    # Escribir antes los cambios pendientes para no cargar un estado anterior
+    get_user_data_writer().flush()
+    return get_user_storage().load_user_data()
 
 # Función para guardar datos del usuario
 def save_user_data(user_data):
-    with open(USER_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(user_data, f, indent=2, ensure_ascii=False)
+    get_user_data_writer().flush()
+    get_user_storage().save_user_data(user_data)
 
-# Función para guardar libros
+# Función para guardar los datos del usuario de un solo libro (leído, calificación, progreso)
+# La escritura se difiere SAVE_DELAY segundos para agrupar cambios seguidos
+def save_user_book(user_data, book_id):
+    get_user_data_writer().save_user_book(user_data, book_id, storage=get_user_storage())
+
+# Función para guardar todos los libros (acepta un Catalog o una lista)
 def save_books(books):
-    with open(BOOKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(books, f, indent=2, ensure_ascii=False)
-    # Limpiar caché para recargar los libros
-    load_books.clear()
+    if isinstance(books, Catalog):
+        books = books.to_list()
+    get_catalog_store().replace(books)
+
+# Función para agregar un libro nuevo (devuelve el libro guardado, con su id)
+def add_book(book):
+    return get_catalog_store().add(book)
+
+# Función para actualizar campos de un libro (devuelve el libro actualizado)
+def update_book(book_id, **changes):
+    return get_catalog_store().update(book_id, **changes)
+
+# Función para eliminar un libro guardado
+def delete_book(book_id):
+    return get_catalog_store().remove(book_id)
+
+# Función para importar libros en lote desde un archivo CSV o JSONL subido
+# (devuelve el ImportResult con los añadidos, repetidos, errores y libros/s)
+def import_books(file, name):
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    return import_records(read_records(text, detect_format(name)), get_catalog_store())
+
+# Función para obtener las estadísticas de lectura de la sesión (se crean una vez)
+def get_reading_stats(books, user_data):
+    if 'reading_stats' not in st.session_state:
+        st.session_state.reading_stats = ReadingStats(books, user_data)
+    return st.session_state.reading_stats
+
+# Función para obtener el análisis del ritmo de lectura de la sesión (acumulados
+# calculados una vez a partir del registro de progreso)
+def get_reading_analytics(books):
+    if 'reading_analytics' not in st.session_state:
+        st.session_state.reading_analytics = ReadingAnalytics(get_user_storage().load_progress_events(), books)
+    return st.session_state.reading_analytics
+
+# Función para registrar un avance de páginas en el registro y en los acumulados
+def record_progress(books, book_id, pages, pages_read):
+    analytics = get_reading_analytics(books)
+    event = progress_event(book_id, pages, pages_read)
+    get_user_storage().append_progress_event(event)
+    analytics.record(event)
+
+# Función para obtener las tablas (DataFrames) de lectura de la sesión (se crean una vez
+# y se actualizan con cada evento en lugar de reconstruirse en cada rerun)
+def get_reading_tables(books, user_data):
+    if 'reading_tables' not in st.session_state:
+        st.session_state.reading_tables = ReadingTables(books, user_data)
+    return st.session_state.reading_tables
 
 # Función para obtener recomendaciones
-def get_recommendations(books, user_data, limit=5):
-    read_books = user_data.get("read_books", [])
-    ratings = user_data.get("ratings", {})
-    
-    # Si no hay libros leídos, recomendar los más populares
-    if not read_books:
-        return books[:limit]
-    
-    # Calcular géneros favoritos basados en calificaciones altas
-    favorite_genres = {}
-    for book_id, rating in ratings.items():
-        if rating >= 4:
-            book = next((b for b in books if b["id"] == int(book_id)), None)
-            if book:
-                genre = book["genre"]
-                favorite_genres[genre] = favorite_genres.get(genre, 0) + rating
-    
-    # Ordenar géneros por puntuación
-    sorted_genres = sorted(favorite_genres.items(), key=lambda x: x[1], reverse=True)
-    
-    # Recomendar libros no leídos de géneros favoritos
-    recommendations = []
-    for genre, _ in sorted_genres:
-        for book in books:
-            if book["id"] not in read_books and book["genre"] == genre:
-                if book not in recommendations:
-                    recommendations.append(book)
-                    if len(recommendations) >= limit:
-                        break
-        if len(recommendations) >= limit:
-            break
-    
-    # Si no hay suficientes, añadir libros no leídos aleatorios
-    if len(recommendations) < limit:
-        for book in books:
-            if book["id"] not in read_books and book not in recommendations:
-                recommendations.append(book)
-                if len(recommendations) >= limit:
-                    break
-    
-    return recommendations[:limit]
+# Con compat=True conserva el orden por géneros favoritos de la versión original
+def get_recommendations(books, user_data, limit=5, compat=True):
+    return books.scorer().recommend(user_data, limit=limit, compat=compat)
+
+# Función para obtener solo los ids recomendados, en orden (los libros se cargan por página)
+def get_recommendation_ids(books, user_data, limit=5, compat=True):
+    return books.scorer().recommend_ids(user_data, limit=limit, compat=compat)
+
+# Función para obtener la página actual de un resultado paginado
+# (el número de página se guarda en session_state[state_key])
+def get_page(source, state_key, page_size=9):
+    page = Paginator(source, page_size).page(st.session_state.get(state_key, 1))
+    st.session_state[state_key] = page.number
+    return page
+
+def _go_to_page(state_key, number):
+    st.session_state[state_key] = number
+
+# Función para mostrar una página de libros en grid de 3 columnas
+def display_book_grid(page_books, user_data, key_prefix="", books=None):
+    prefetch_covers(page_books)
+    for i in range(0, len(page_books), 3):
+        cols = st.columns(3)
+        for book, col in zip(page_books[i:i + 3], cols):
+            display_book_card(book, user_data, col, key_prefix=key_prefix, books=books)
+
+# Función para mostrar los controles de paginación
+def display_pagination(page, state_key, key_prefix=""):
+    if page.total_pages <= 1:
+        return
+    st.divider()
+    col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+
+    with col1:
+        st.button("⏮️ Primera", disabled=not page.has_prev, key=f"{key_prefix}first_page",
+                  on_click=_go_to_page, args=(state_key, 1))
+
+    with col2:
+        st.button("◀️ Anterior", disabled=not page.has_prev, key=f"{key_prefix}prev_page",
+                  on_click=_go_to_page, args=(state_key, page.number - 1))
+
+    with col3:
+        st.markdown(f"<div style='text-align: center; padding: 8px;'>Página {page.number} de {page.total_pages}</div>", unsafe_allow_html=True)
+
+    with col4:
+        st.button("Siguiente ▶️", disabled=not page.has_next, key=f"{key_prefix}next_page",
+                  on_click=_go_to_page, args=(state_key, page.number + 1))
+
+    with col5:
+        st.button("Última ⏭️", disabled=not page.has_next, key=f"{key_prefix}last_page",
+                  on_click=_go_to_page, args=(state_key, page.total_pages))
 
 # Función para mostrar una tarjeta de libro
-def display_book_card(book, user_data, col, key_prefix=""):
+def display_book_card(book, user_data, col, key_prefix="", books=None):
     with col:
-        # Contenedor con altura mínima
-        st.markdown("""
-        <style>
-        .book-container {
-            min-height: 320px;
-            display: flex;
-            flex-direction: column;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        with st.container():
-            # Layout horizontal: imagen y contenido
-            img_col, content_col = st.columns([1, 3])
-            
-            # Columna de imagen con tamaño fijo
-            with img_col:
-                cover_url = book.get("cover", "")
-                if cover_url:
-                    st.markdown(f"""
-                    <div style="width: 100px; height: 150px; overflow: hidden; border-radius: 8px; box-shadow: 0 4px 8px rgba(0,0,0,0.3); background-color: #f0f0f0;">
-                        <img src="{cover_url}" style="width: 100%; height: 100%; object-fit: cover;" />
-                    </div>
-                    """, unsafe_allow_html=True)
-            
-            # Columna de contenido
-            with content_col:
-                # Título con máximo 2 líneas
-                title = book['title']
-                if len(title) > 50:
-                    title = title[:47] + "..."
-                
-                st.markdown(f"""
-                <div style="padding: 5px;">
-                    <h3 style="margin-top: 0; font-size: 1.1em; margin-bottom: 10px; border-bottom: 2px solid #667eea; padding-bottom: 5px; font-weight: 600; line-height: 1.3; max-height: 2.6em; overflow: hidden;">
-                        📖 {title}
-                    </h3>
-                    <p style="margin: 6px 0; font-size: 0.9em; line-height: 1.4;">
-                        <strong>✍️ Autor:</strong> {book['author']}
-                    </p>
-                    <p style="margin: 6px 0; font-size: 0.9em; line-height: 1.4;">
-                        <strong>🏷️ Género:</strong> <span style="background-color: #667eea; color: white; padding: 3px 8px; border-radius: 4px; font-size: 0.85em; font-weight: 500;">{book['genre']}</span>
-                    </p>
-                    <p style="margin: 6px 0; font-size: 0.9em; line-height: 1.4;">
-                        <strong>📅 Año:</strong> {book['year']} &nbsp;&nbsp; <strong>📄 Páginas:</strong> {book['pages']}
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Descripción con altura fija
-            description = book['description']
-            if len(description) > 150:
-                description = description[:147] + "..."
-            
-            st.markdown(f"""
-            <div style="
-                height: 85px;
-                overflow: hidden;
-                padding: 10px;
-                background-color: rgba(102, 126, 234, 0.08);
-                border-left: 3px solid #667eea;
-                border-radius: 5px;
-                margin: 12px 0 8px 0;
-                font-size: 0.88em;
-                line-height: 1.5;">
-                {description}
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Estado de lectura
-        is_read = book["id"] in user_data.get("read_books", [])
-        
-        col1, col2 = st.columns([1, 1])
-        with col1:
-            if is_read:
-                st.success("✓ Leído")
-            else:
-                if st.button(f"Marcar como leído", key=f"{key_prefix}read_{book['id']}"):
-                    user_data["read_books"].append(book["id"])
-                    save_user_data(user_data)
-                    st.rerun()
+        # Parte estática en un solo bloque HTML (los estilos van en CARD_CSS)
+        cover = get_cover_cache().data_uri(book.get("cover"))
+        st.markdown(card_html(book, cover), unsafe_allow_html=True)
         
-        with col2:
-            if is_read:
-                if st.button(f"Marcar como no leído", key=f"{key_prefix}unread_{book['id']}"):
-                    user_data["read_books"].remove(book["id"])
-                    if str(book["id"]) in user_data.get("ratings", {}):
-                        del user_data["ratings"][str(book["id"])]
-                    save_user_data(user_data)
-                    st.rerun()
+        # Estado de lectura, calificación y similares (se re-ejecutan solos)
+        _book_card_actions(book, user_data, key_prefix, books)
         
-        # Calificación (solo si está marcado como leído)
+        st.markdown("---")
+
+# Parte interactiva de la tarjeta. Al ser un fragmento, un clic solo vuelve a
+# ejecutar esta tarjeta (y refresca las estadísticas del sidebar), no toda la app
+@st.fragment
+def _book_card_actions(book, user_data, key_prefix, books):
+    is_read = book["id"] in user_data.get("read_books", [])
+    
+    col1, col2 = st.columns([1, 1])
+    with col1:
         if is_read:
-            current_rating = user_data.get("ratings", {}).get(str(book["id"]), 0)
-            rating = st.slider(
-                "Calificación",
-                0, 5, 
-                current_rating,
-                key=f"{key_prefix}rating_{book['id']}"
+            st.success("✓ Leído")
+        else:
+            st.button(
+                f"Marcar como leído",
+                key=f"{key_prefix}read_{book['id']}",
+                on_click=_mark_read,
+                args=(book, user_data)
             )
-            if rating != current_rating:
-                if "ratings" not in user_data:
-                    user_data["ratings"] = {}
-                user_data["ratings"][str(book["id"])] = rating
-                save_user_data(user_data)
-        
-        st.markdown("---")
+    
+    with col2:
+        if is_read:
+            st.button(
+                f"Marcar como no leído",
+                key=f"{key_prefix}unread_{book['id']}",
+                on_click=_mark_unread,
+                args=(book, user_data)
+            )
+    
+    # Calificación (solo si está marcado como leído)
+    if is_read:
+        rating_key = f"{key_prefix}rating_{book['id']}"
+        st.slider(
+            "Calificación",
+            0, 5, 
+            user_data.get("ratings", {}).get(str(book["id"]), 0),
+            key=rating_key,
+            on_change=_rate,
+            args=(book, user_data, rating_key)
+        )
+    
+    # Libros similares (solo se calculan si el usuario los pide)
+    if books is not None:
+        if st.toggle("🔗 Ver similares", key=f"{key_prefix}similar_{book['id']}"):
+            for similar in books.similar_books(book["id"], limit=3):
+                st.caption(f"📖 {similar['title']} — {similar['author']}")
+    
+    # Refrescar las estadísticas del sidebar si alguna acción las cambió
+    if st.session_state.pop("stats_dirty", False) and "refresh_sidebar_stats" in st.session_state:
+        st.session_state.refresh_sidebar_stats()
+
+# Callbacks de la tarjeta: se ejecutan antes de volver a dibujarla
+def _mark_read(book, user_data):
+    user_data["read_books"].append(book["id"])
+    st.session_state.reading_stats.mark_read(book)
+    if 'reading_tables' in st.session_state:
+        st.session_state.reading_tables.mark_read(book)
+    save_user_book(user_data, book["id"])
+    st.session_state.stats_dirty = True
+
+def _mark_unread(book, user_data):
+    user_data["read_books"].remove(book["id"])
+    if str(book["id"]) in user_data.get("ratings", {}):
+        del user_data["ratings"][str(book["id"])]
+    st.session_state.reading_stats.unmark_read(book["id"])
+    if 'reading_tables' in st.session_state:
+        st.session_state.reading_tables.unmark_read(book["id"])
+    save_user_book(user_data, book["id"])
+    st.session_state.stats_dirty = True
+
+def _rate(book, user_data, rating_key):
+    rating = st.session_state[rating_key]
+    if "ratings" not in user_data:
+        user_data["ratings"] = {}
+    user_data["ratings"][str(book["id"])] = rating
+    st.session_state.reading_stats.set_rating(book["id"], rating)
+    if 'reading_tables' in st.session_state:
+        st.session_state.reading_tables.set_rating(book["id"], rating)
+    save_user_book(user_data, book["id"])
+    st.session_state.stats_dirty = True
+
+# Función para dibujar las estadísticas del sidebar dentro de su contenedor
+def render_sidebar_stats(placeholder, stats, total_count):
+    with placeholder.container():
+        read_count = stats.read_count
+        st.metric("Libros leídos", f"{read_count}/{total_count}")
+
+        if read_count > 0:
+            st.metric("Páginas leídas", f"{stats.total_pages:,}")
+
+            if stats.rating_count:
+                st.metric("Calificación promedio", f"{stats.average_rating:.1f}/5")
+
+            top_genres = stats.top_genres(3)
+            if top_genres:
+                st.subheader("Géneros más leídos")
+                for genre, count in top_genres:
+                    st.write(f"• {genre}: {count}")